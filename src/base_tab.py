@@ -32,6 +32,46 @@ class BaseTab(tk.Frame):
         button.grid(row=row, column=0, columnspan=2, pady=10)
         return button
 
+    def create_options_frame(self, row):
+        """创建选项区域，用于横向排列若干"标签+输入控件"形式的选项"""
+        frame = tk.Frame(self)
+        frame.grid(row=row, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        return frame
+
+    def add_spinbox_option(self, frame, row, column, label_text, from_, to, default):
+        """在选项区域中添加数值选项（标签+Spinbox），返回绑定的 IntVar"""
+        var = tk.IntVar(value=default)
+        label = tk.Label(frame, text=label_text)
+        label.grid(row=row, column=column * 2, padx=5, pady=2, sticky="w")
+        spinbox = tk.Spinbox(frame, from_=from_, to=to, textvariable=var, width=6)
+        spinbox.grid(row=row, column=column * 2 + 1, padx=5, pady=2, sticky="w")
+        return var
+
+    def add_combobox_option(self, frame, row, column, label_text, values, default):
+        """在选项区域中添加下拉选项（标签+只读 Combobox），返回绑定的 StringVar"""
+        var = tk.StringVar(value=default)
+        label = tk.Label(frame, text=label_text)
+        label.grid(row=row, column=column * 2, padx=5, pady=2, sticky="w")
+        combobox = ttk.Combobox(frame, textvariable=var, values=values, state="readonly", width=12)
+        combobox.grid(row=row, column=column * 2 + 1, padx=5, pady=2, sticky="w")
+        return var
+
+    def add_entry_option(self, frame, row, column, label_text, default=""):
+        """在选项区域中添加文本选项（标签+Entry），返回绑定的 StringVar"""
+        var = tk.StringVar(value=default)
+        label = tk.Label(frame, text=label_text)
+        label.grid(row=row, column=column * 2, padx=5, pady=2, sticky="w")
+        entry = tk.Entry(frame, textvariable=var, width=14)
+        entry.grid(row=row, column=column * 2 + 1, padx=5, pady=2, sticky="w")
+        return var
+
+    def add_checkbox_option(self, frame, row, column, label_text, default=False):
+        """在选项区域中添加开关选项（Checkbutton），返回绑定的 BooleanVar"""
+        var = tk.BooleanVar(value=default)
+        checkbox = tk.Checkbutton(frame, text=label_text, variable=var)
+        checkbox.grid(row=row, column=column * 2, columnspan=2, padx=5, pady=2, sticky="w")
+        return var
+
     def create_progress_bar(self):
         """创建进度条"""
         progress_var = tk.DoubleVar(value=0)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+
+def get_app_dir():
+    """应用程序所在目录：打包后为可执行文件所在目录，直接运行时为脚本所在目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_cache_dir(name):
+    """
+    应用程序目录下的缓存子目录（cache/<name>），不存在时自动创建。
+    无法创建时（如程序目录只读）返回 None，调用方应不使用缓存。
+    """
+    cache_dir = os.path.join(get_app_dir(), 'cache', name)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return cache_dir
+
+
+def evict_lru(cache_dir, max_bytes, suffix):
+    """
+    按最近使用时间（文件修改时间）淘汰缓存目录中以 suffix 结尾的文件，
+    直到总大小不超过 max_bytes。命中缓存时应调用 os.utime 更新文件的修改时间。
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,210 @@
+import copy
+import io
+import re
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from docx.opc.constants import CONTENT_TYPE
+from docx.opc.oxml import parse_xml, serialize_part_xml
+from docx.oxml.ns import qn
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+from lxml import etree
+
+from docx_zip import compress_entry, read_raw_entries, write_raw_zip
+
+# docxtpl.render_properties 中会被渲染的核心属性
+CORE_PROPERTIES = ["author", "comments", "identifier", "language", "subject", "title"]
+
+
+class CompiledTemplate:
+    """
+    "编译"后的 Word 模板。
+
+    DocxTemplate.render() 每次都会重新解析 docx、预处理 XML、编译 Jinja 模板并重新序列化
+    整个包。CompiledTemplate 在构造时只做一次这些工作：
+    - 正文、页眉、页脚、脚注的 XML 预处理后编译为 Jinja 模板；
+    - 其余部件按 python-docx 的序列化结果保存为原始字节。
+    之后每行数据只需一次 Jinja 渲染和一次 ZIP 写入。
+
+    接口与 DocxTemplate 保持一致（render + save），对普通 {{变量}} 模板，
+    生成文件中每个部件的内容与 DocxTemplate 逐字节相同。
+
+    compresslevel 不为 None 时改用直通写出：模板中未渲染的部件（字体、图片、样式等）
+    直接复制原始压缩数据，只有渲染后的 XML 按该级别压缩（0 表示仅存储）。
+    此时未渲染部件保持模板原样，不再与 DocxTemplate 逐字节相同。
+
+    注意：InlineImage、Subdoc 等会向文档包中新增部件的对象不受支持，
+    需要这些功能时请使用 DocxTemplate。
+    """
+
+    def __init__(self, template_path, jinja_env=None, compresslevel=None):
+        self.template_path = template_path
+        self.jinja_env = jinja_env or Environment()
+        self.compresslevel = compresslevel
+
+        # 借用 DocxTemplate 的 XML 预处理 / 后处理逻辑，保证与其输出一致
+        self._tpl = DocxTemplate(template_path)
+        self._tpl.init_docx()
+        docx = self._tpl.docx
+
+        # 文档缺少核心属性部件时 python-docx 会在访问时补上，需在序列化之前触发
+        core_part = docx.part.package._core_properties_part
+
+        # 以 python-docx 的保存结果作为静态部件（成员顺序与 doc.save 相同）
+        buffer = io.BytesIO()
+        docx.save(buffer)
+        with ZipFile(buffer) as zf:
+            self._members = [(name, zf.read(name)) for name in zf.namelist()]
+
+        # 正文：保留 document 根节点，每次渲染时替换其中的 body
+        self._document_element = docx.element
+        self._body = docx.element.body
+        self._document_member = docx.part.partname.membername
+        self._body_template = self._compile(self._tpl.patch_xml(self._tpl.get_xml()))
+
+        # 页眉 / 页脚
+        self._header_footer_templates = []
+        for uri in (DocxTemplate.HEADER_URI, DocxTemplate.FOOTER_URI):
+            for _, part in self._tpl.get_headers_footers(uri):
+                xml = self._tpl.get_part_xml(part)
+                encoding = self._tpl.get_headers_footers_encoding(xml)
+                self._header_footer_templates.append(
+                    (part.partname.membername, encoding, self._compile(self._tpl.patch_xml(xml)))
+                )
+
+        # 脚注
+        self._footnote_templates = []
+        for part in docx.part.package.parts:
+            if part.content_type == CONTENT_TYPE.WML_FOOTNOTES:
+                xml = self._tpl.patch_xml(part.blob.decode("utf-8"))
+                self._footnote_templates.append((part.partname.membername, self._compile(xml)))
+
+        # 核心属性（标题、作者等）
+        self._core_part = core_part
+        self._core_member = core_part.partname.membername
+        self._core_element = copy.deepcopy(core_part.element)
+        self._core_templates = [
+            (prop, self.jinja_env.from_string(getattr(docx.core_properties, prop)))
+            for prop in CORE_PROPERTIES
+        ]
+
+        # 直通写出所需的模板原始成员；模板缺少需要渲染的部件时（如缺少 core.xml）
+        # 无法直通，退回到普通写出方式
+        self._raw_entries = None
+        if compresslevel is not None:
+            raw_entries = read_raw_entries(template_path)
+            rendered_members = {self._document_member, self._core_member}
+            rendered_members.update(member for member, _, _ in self._header_footer_templates)
+            rendered_members.update(member for member, _ in self._footnote_templates)
+            if rendered_members <= {entry.name for entry in raw_entries}:
+                self._raw_entries = raw_entries
+
+        self._rendered = None
+
+    def _compile(self, src_xml):
+        """与 DocxTemplate.render_xml_part 相同的预处理，之后编译为 Jinja 模板"""
+        src_xml = re.sub(r"<w:p([ >])", r"\n<w:p\1", src_xml)
+        return self.jinja_env.from_string(src_xml)
+
+    def _render_xml(self, template, context):
+        """与 DocxTemplate.render_xml_part 相同的后处理"""
+        dst_xml = template.render(context)
+        dst_xml = re.sub(r"\n<w:p([ >])", r"<w:p\1", dst_xml)
+        dst_xml = (
+            dst_xml.replace("{_{", "{{")
+            .replace("}_}", "}}")
+            .replace("{_%", "{%")
+            .replace("%_}", "%}")
+        )
+        return self._tpl.resolve_listing(dst_xml)
+
+    def render_body(self, context, docpr_start=1000):
+        """渲染正文，返回新的 body 节点；图片等对象的 docPr 编号从 docpr_start + 1 开始"""
+        self._tpl.current_rendering_part = self._tpl.docx.part
+        tree = self._tpl.fix_tables(self._render_xml(self._body_template, context))
+        self._tpl.docx_ids_index = docpr_start
+        self._tpl.fix_docpr_ids(tree)
+        return tree
+
+    def _render_core(self, context):
+        """渲染核心属性，返回 core.xml 的字节内容"""
+        self._core_part._element = copy.deepcopy(self._core_element)
+        core_properties = self._core_part.core_properties
+        for prop, template in self._core_templates:
+            setattr(core_properties, prop, template.render(context))
+        return self._core_part.blob
+
+    def render_parts(self, context):
+        """渲染正文以外的部件（页眉、页脚、核心属性、脚注），返回 {成员名: 内容}"""
+        rendered = {}
+
+        for member, encoding, template in self._header_footer_templates:
+            xml = self._render_xml(template, context).encode(encoding)
+            rendered[member] = serialize_part_xml(parse_xml(xml))
+
+        rendered[self._core_member] = self._render_core(context)
+
+        for member, template in self._footnote_templates:
+            rendered[member] = self._render_xml(template, context).encode("utf-8")
+
+        return rendered
+
+    def document_xml_parts(self):
+        """
+        返回 document.xml 中 body 内容之前和之后的部分 (前缀, 后缀)，
+        用于逐段拼接正文（如合并输出）。
+        """
+        root = copy.deepcopy(self._document_element)
+        body = root.find(qn("w:body"))
+        for child in list(body):
+            body.remove(child)
+        body.append(etree.Comment("BODY"))
+        prefix, suffix = serialize_part_xml(root).split(b"<!--BODY-->")
+        return prefix, suffix
+
+    @property
+    def document_member(self):
+        """document.xml 在 ZIP 中的成员名"""
+        return self._document_member
+
+    def render(self, context):
+        """渲染一行数据，结果保存在内部，供随后的 save() 写出"""
+        tree = self.render_body(context)
+        self._document_element.replace(self._body, tree)
+        self._body = tree
+
+        rendered = self.render_parts(context)
+        rendered[self._document_member] = serialize_part_xml(self._document_element)
+        self._rendered = rendered
+
+    def iter_members(self, rendered=None):
+        """
+        按 doc.save 的顺序依次产生 (成员名, 内容)，已渲染的部件替换为渲染结果。
+        rendered 默认为最近一次 render() 的结果。
+        """
+        if rendered is None:
+            rendered = self._rendered
+        if rendered is None:
+            raise RuntimeError("请先调用 render() 再保存文档！")
+        for name, blob in self._members:
+            yield name, rendered.get(name, blob)
+
+    def save(self, filename):
+        """保存最近一次渲染的结果，filename 可以是路径或文件对象"""
+        if self._raw_entries is not None:
+            self._save_passthrough(filename)
+            return
+        with ZipFile(filename, "w", compression=ZIP_DEFLATED) as zf:
+            for name, blob in self.iter_members():
+                zf.writestr(name, blob)
+
+    def _save_passthrough(self, filename):
+        """直通写出：未渲染的部件原样复制，只压缩渲染后的部件"""
+        if self._rendered is None:
+            raise RuntimeError("请先调用 render() 再保存文档！")
+        entries = [
+            compress_entry(entry.name, self._rendered[entry.name], self.compresslevel)
+            if entry.name in self._rendered else entry
+            for entry in self._raw_entries
+        ]
+        write_raw_zip(filename, entries)
@@ -0,0 +1,66 @@
+import json
+import os
+
+from run_manifest import file_hash
+
+# 转换记录保存在 PDF 输出目录中
+CACHE_NAME = ".office-tools-pdf-cache.json"
+
+
+class ConversionCache:
+    """
+    PDF 转换记录，用于跳过源文件未变化的转换。
+
+    每个源文件（按绝对路径）记录大小、修改时间、内容哈希和生成的 PDF 路径。
+    大小和修改时间都未变化时直接认为未变化；修改时间变了但大小相同时再比较内容哈希，
+    只是被"碰"了一下的文件不会重新转换。PDF 被删除时重新转换。
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, CACHE_NAME)
+        self.entries = self._load()
+
+    def _load(self):
+        """读取已有记录，文件不存在或损坏时返回空记录"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def is_up_to_date(self, file_path):
+        """源文件自上次转换后未变化且 PDF 仍然存在时返回 True"""
+        entry = self.entries.get(os.path.abspath(file_path))
+        if not entry or not os.path.isfile(entry["pdf"]):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if file_hash(file_path) != entry["hash"]:
+            return False
+        # 内容未变，只是修改时间变了：更新记录，下次不必再计算哈希
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record(self, file_path, pdf_path):
+        """记录一个转换成功的文件"""
+        stat = os.stat(file_path)
+        self.entries[os.path.abspath(file_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": file_hash(file_path),
+            "pdf": os.path.abspath(pdf_path),
+        }
+
+    def save(self):
+        """写回记录文件（先写临时文件再替换，中途退出不会留下损坏的记录）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
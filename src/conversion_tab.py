@@ -1,17 +1,18 @@
 import os
-import platform
-import subprocess
 import tkinter as tk
 import traceback
 from tkinter import filedialog
 
 from base_tab import BaseTab
+from conversion_cache import ConversionCache
+from office_server import convert_files_with_server, get_office_server, uno_available
+from pdf_converter import convert_files_to_pdf, find_libreoffice_path
 
 
 class ConversionTab(BaseTab):
     """
     文件格式转换功能 Tab，用于将选中的 Word 文件（.doc 或 .docx）批量转换为 PDF
-    使用 LibreOffice 的命令行模式进行转换。
+    使用 LibreOffice 的命令行模式进行转换，可同时运行多个 LibreOffice 进程。
     """
 
     def __init__(self, master=None):
@@ -39,9 +40,42 @@ class ConversionTab(BaseTab):
             command=self.choose_output_dir
         )
 
+        # 转换选项
+        self.options_frame = self.create_options_frame(row=2)
+        self.workers_var = self.add_spinbox_option(
+            self.options_frame,
+            row=0,
+            column=0,
+            label_text="同时转换数",
+            from_=1,
+            to=os.cpu_count() or 1,
+            default=1
+        )
+        self.batch_size_var = self.add_spinbox_option(
+            self.options_frame,
+            row=0,
+            column=1,
+            label_text="每批文件数",
+            from_=1,
+            to=500,
+            default=1
+        )
+        self.use_server_var = self.add_checkbox_option(
+            self.options_frame,
+            row=1,
+            column=0,
+            label_text="使用常驻 LibreOffice 服务（UNO，省去每次启动的时间）"
+        )
+        self.force_var = self.add_checkbox_option(
+            self.options_frame,
+            row=1,
+            column=1,
+            label_text="强制重新转换（不跳过未变化的文件）"
+        )
+
         # 转换按钮
         self.convert_btn = self.create_action_button(
-            row=2,
+            row=3,
             text="开始转换",
             command=self.start_conversion
         )
@@ -50,7 +84,7 @@ class ConversionTab(BaseTab):
         self.progress_var, self.progress_bar = self.create_progress_bar()
 
         # 状态文本区
-        self.status_text = self.create_status_area(row=3)
+        self.status_text = self.create_status_area(row=4)
 
     def choose_word_files(self):
         """选择Word文件"""
@@ -70,47 +104,6 @@ class ConversionTab(BaseTab):
             self.output_dir = dir_
             self.output_label.config(text=dir_)
 
-    def find_libreoffice_path(self):
-        """
-        查找 LibreOffice 可执行文件的路径
-        返回可执行文件路径或 None（如果未找到）
-        """
-        # 常见的 LibreOffice 可执行文件路径
-        possible_paths = []
-
-        if platform.system() == "Darwin":  # macOS
-            possible_paths = [
-                "/Applications/LibreOffice.app/Contents/MacOS/soffice",
-                "/Applications/OpenOffice.app/Contents/MacOS/soffice",
-                "/usr/local/bin/soffice"
-            ]
-        elif platform.system() == "Windows":  # Windows
-            possible_paths = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-                r"C:\Program Files\OpenOffice\program\soffice.exe",
-                r"C:\Program Files (x86)\OpenOffice\program\soffice.exe"
-            ]
-        else:  # Linux 和其他系统
-            possible_paths = [
-                "/usr/bin/soffice",
-                "/usr/local/bin/soffice",
-                "/opt/libreoffice/program/soffice"
-            ]
-
-        # 检查命令是否存在于 PATH 中
-        import shutil
-        soffice_in_path = shutil.which("soffice")
-        if soffice_in_path:
-            possible_paths.insert(0, soffice_in_path)
-
-        # 检查每个可能的路径
-        for path in possible_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
-                return path
-
-        return None
-
     def start_conversion(self):
         """开始转换处理"""
         self.update_status("", clear=True)
@@ -121,13 +114,13 @@ class ConversionTab(BaseTab):
             return
 
         # 显示进度条
-        self.progress_bar.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="we")
+        self.progress_bar.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="we")
 
         # 禁用按钮，防止重复操作
         self.toggle_buttons(enabled=False)
 
         # 查找 LibreOffice 路径
-        libreoffice_path = self.find_libreoffice_path()
+        libreoffice_path = find_libreoffice_path()
         if not libreoffice_path:
             error_msg = "无法找到 LibreOffice 可执行文件。请确保已安装 LibreOffice 并且可以从命令行访问。"
             self.update_status(error_msg)
@@ -156,80 +149,57 @@ class ConversionTab(BaseTab):
         self.convert_btn.config(state=state)
 
     def convert_files(self, libreoffice_path):
-        """执行文件转换"""
+        """
+        执行文件转换，多个文件同时转换，按完成的先后报告结果。
+        输出目录中记录每个源文件转换时的状态，未勾选强制重新转换时跳过自上次转换后未变化的文件。
+        """
         total = len(self.word_files)
         success_count = 0
+        failed_count = 0
+        workers = self.workers_var.get()
+        batch_size = self.batch_size_var.get()
+
+        cache = ConversionCache(self.output_dir)
+        if self.force_var.get():
+            files = list(self.word_files)
+        else:
+            files = [f for f in self.word_files if not cache.is_up_to_date(f)]
+        skipped_count = total - len(files)
+        if skipped_count:
+            self.update_status(f"跳过 {skipped_count} 个未变化的文件（PDF 已是最新）")
+
+        use_server = self.use_server_var.get()
+        if use_server and not uno_available():
+            self.update_status("当前环境没有 LibreOffice 的 uno 模块，改用命令行方式转换。")
+            use_server = False
+
+        if use_server:
+            # 常驻服务在多次转换之间复用，程序退出时自动关闭
+            self.update_status(f"开始转换 {len(files)} 个文件（使用常驻 LibreOffice 服务）")
+            results = convert_files_with_server(get_office_server(libreoffice_path), files, self.output_dir)
+        else:
+            self.update_status(f"开始转换 {len(files)} 个文件（同时转换 {workers} 个，每批 {batch_size} 个文件）")
+            results = convert_files_to_pdf(libreoffice_path, files, self.output_dir,
+                                           workers=workers, batch_size=batch_size)
+        try:
+            for idx, (file, pdf_path, error) in enumerate(results):
+                if error is None:
+                    self.update_status(f"已转换: {os.path.basename(file)} -> {os.path.basename(pdf_path)}")
+                    cache.record(file, pdf_path)
+                    success_count += 1
+                else:
+                    self.update_status(f"转换失败: {os.path.basename(file)}，错误信息: {str(error)}")
+                    failed_count += 1
+
+                # 更新进度条（跳过的文件算作已完成）
+                progress_percentage = ((skipped_count + idx + 1) / total) * 100
+                self.progress_var.set(progress_percentage)
+                self.master.update_idletasks()
+        finally:
+            # 中途出错时已转换的文件也要记录下来
+            cache.save()
 
-        for idx, file in enumerate(self.word_files):
-            base_name = os.path.splitext(os.path.basename(file))[0]
-
-            try:
-                # 确保文件路径是绝对路径
-                abs_file_path = os.path.abspath(file)
-                abs_output_dir = os.path.abspath(self.output_dir)
-
-                self.update_status(f"正在转换: {os.path.basename(file)}")
-
-                # 创建一个临时日志文件来捕获输出
-                log_file = os.path.join(abs_output_dir, f"conversion_log_{base_name}.txt")
-
-                # 构建命令
-                cmd = [
-                    libreoffice_path,
-                    "--headless",
-                    "--convert-to", "pdf",
-                    abs_file_path,
-                    "--outdir", abs_output_dir
-                ]
-
-                # 在 Windows 上，使用 shell=True 可能更可靠
-                use_shell = platform.system() == "Windows"
-
-                # 执行命令，将输出重定向到日志文件
-                with open(log_file, 'w') as log:
-                    process = subprocess.Popen(
-                        cmd,
-                        stdout=log,
-                        stderr=log,
-                        shell=use_shell,
-                        text=True
-                    )
-
-                    # 等待进程完成，设置超时
-                    try:
-                        process.wait(timeout=60)  # 60秒超时
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                        raise Exception(f"转换超时: {os.path.basename(file)}")
-
-                # 检查进程返回码
-                if process.returncode != 0:
-                    with open(log_file, 'r') as log:
-                        error_output = log.read()
-                    raise Exception(f"转换失败，返回码: {process.returncode}\n{error_output}")
-
-                # 检查PDF是否实际生成
-                expected_pdf = os.path.join(abs_output_dir, f"{base_name}.pdf")
-                if not os.path.exists(expected_pdf):
-                    raise Exception(f"PDF文件未生成: {expected_pdf}")
-
-                self.update_status(f"已转换: {os.path.basename(file)} -> {base_name}.pdf")
-                success_count += 1
-
-                # 删除临时日志文件
-                try:
-                    os.remove(log_file)
-                except:
-                    pass
-
-            except Exception as e:
-                self.update_status(f"转换失败: {os.path.basename(file)}，错误信息: {str(e)}")
-
-            # 更新进度条
-            progress_percentage = ((idx + 1) / total) * 100
-            self.progress_var.set(progress_percentage)
-            self.master.update_idletasks()
-
-        msg = f"转换完成，共转换 {success_count}/{total} 个文件！"
+        self.progress_var.set(100)
+        msg = f"转换完成：转换 {success_count} 个，跳过 {skipped_count} 个，失败 {failed_count} 个（共 {total} 个文件）"
         self.update_status(msg)
         self.show_message("提示", msg)
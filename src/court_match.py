@@ -1,5 +1,274 @@
+import argparse
 import csv
+import mmap
+import os
+import pickle
 import re
+import shutil
+import tempfile
+import unicodedata
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from cache_utils import evict_lru, get_cache_dir
+from row_source import DELIMITED_EXTENSIONS, PARQUET_EXTENSIONS, read_table
+from run_manifest import file_hash
+
+# 流式匹配时写出缓冲区大小，以及两次进度回调之间处理的地址数
+WRITE_BUFFER_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 10000
+
+# 地址文件小于该大小时不启用多进程（进程启动和构建索引的开销大于收益）
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# 省、市名称的后缀，地址中常被省略（如 "吉林长春朝阳区"）
+REGION_SUFFIXES = ("特别行政区", "维吾尔自治区", "壮族自治区", "回族自治区", "自治区", "自治州", "省", "市", "地区", "盟")
+
+# 无法唯一确定法院时结果的前缀，如 "歧义：北京市朝阳区人民法院|长春市朝阳区人民法院"
+AMBIGUOUS_PREFIX = "歧义："
+
+# 索引缓存的格式版本，索引结构变化时修改，旧缓存自动失效；缓存目录的大小上限
+INDEX_CACHE_VERSION = 2
+INDEX_CACHE_MAX_BYTES = 256 * 1024 * 1024
+INDEX_CACHE_SUFFIX = ".pkl"
+
+# 规范化地址 -> 法院 的缓存最多保留的地址数
+MEMO_SIZE = 100000
+
+# 规范化时去掉的空白、标点和符号
+_NOISE_PATTERN = re.compile(r"[\s\W_]+")
+
+# 表格匹配时写入结果的默认列名
+RESULT_COLUMN = "管辖法院"
+
+# 辖区明细中的一条记录：省份、城市可以为空
+CourtEntry = namedtuple("CourtEntry", ["province", "city", "district", "court"])
+
+# 匹配结果统计：地址数量、缓存命中次数、未命中次数
+MatchStats = namedtuple("MatchStats", ["count", "hits", "misses"])
+
+class DistrictIndex:
+    """
+    区名索引（Aho-Corasick 自动机），用于在地址中查找区名。
+
+    构造时把所有区名建成一棵字典树并补上失败指针，之后每个地址只需从左到右扫描一遍，
+    耗时与地址长度成正比，与区名数量无关。
+    匹配采用"最左最长"规则：优先取起始位置最靠前的区名，起始位置相同时取最长的区名，
+    结果与区名的先后顺序无关。
+
+    用法:
+        index = DistrictIndex(district_to_court)
+        index.search("北京市朝阳区xx路")   # -> (3, 6, "朝阳区")
+        index.find_all(address)            # -> 地址中出现的所有区名（互不重叠）
+        index.match(address)               # -> 对应的法院，未匹配时为 "无"
+    """
+
+    def __init__(self, district_to_court):
+        self.district_to_court = dict(district_to_court)
+        self.max_len = max((len(key) for key in self.district_to_court), default=0)
+
+        # 第 i 个节点的转移表、失败指针，以及以该节点结尾的最长区名长度（沿失败指针取最大）
+        self._goto = [{}]
+        self._fail = [0]
+        self._longest = [0]
+
+        for key in self.district_to_court:
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._longest.append(0)
+                state = next_state
+            self._longest[state] = len(key)
+
+        # 按层次遍历计算失败指针
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._longest[next_state] = max(self._longest[next_state], self._longest[self._fail[next_state]])
+                queue.append(next_state)
+
+    def search(self, text, pos=0):
+        """
+        从 pos 开始查找第一个区名（最左最长），返回 (起始位置, 结束位置, 区名)，没有时返回 None
+        """
+        goto, fail, longest = self._goto, self._fail, self._longest
+        state = 0
+        best_start = best_end = -1
+        for i in range(pos, len(text)):
+            # 之后结束的区名起始位置都在 best_start 之后，不必再找
+            if best_start >= 0 and i - self.max_len >= best_start:
+                break
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            length = longest[state]
+            if length:
+                start = i - length + 1
+                if best_start < 0 or start < best_start or (start == best_start and i + 1 > best_end):
+                    best_start, best_end = start, i + 1
+        if best_start < 0:
+            return None
+        return best_start, best_end, text[best_start:best_end]
+
+    def find_all(self, text):
+        """返回地址中出现的所有区名 [(起始位置, 结束位置, 区名)]，互不重叠，可用于发现冲突"""
+        matches = []
+        pos = 0
+        while True:
+            found = self.search(text, pos)
+            if found is None:
+                return matches
+            matches.append(found)
+            pos = found[1]
+
+    def match(self, address):
+        """返回地址对应的法院，未匹配到区名时返回 "无" """
+        found = self.search(address)
+        if found is None:
+            return "无"
+        return self.district_to_court.get(found[2], "无")
+
+class CourtIndex:
+    """
+    分级（省份 / 城市 / 区县）的辖区法院索引，用于区分重名的区县（如北京和长春都有朝阳区）。
+
+    所有省份、城市（含省略 "省"、"市" 等后缀的简称）和区县名称建在同一个 DistrictIndex 中，
+    每个地址只扫描一遍：先取地址中第一个区县名称对应的全部记录，再用区县之前出现的省份、城市筛选。
+    - 只剩一个法院：返回该法院；
+    - 仍有多个法院：返回 "歧义：法院A|法院B"，不做猜测；
+    - 没有找到区县：返回 "无"。
+    记录的省份 / 城市为空时不参与筛选；地址中的省份 / 城市与所有记录都不符时不做筛选。
+    """
+
+    def __init__(self, entries):
+        self.entries = [CourtEntry(*entry) for entry in entries]
+
+        # 名称 -> [(类别, 值)]：区县的值为记录序号，省份 / 城市的值为完整名称
+        names = {}
+        for i, entry in enumerate(self.entries):
+            names.setdefault(entry.district, {})[("district", i)] = None
+            for kind, name in (("province", entry.province), ("city", entry.city)):
+                if name:
+                    for alias in _region_aliases(name):
+                        names.setdefault(alias, {})[(kind, name)] = None
+        self._index = DistrictIndex({name: list(roles) for name, roles in names.items()})
+
+        # 城市 -> 所属省份（用于检查地址中的城市是否与省份相符）
+        self._city_provinces = {}
+        for entry in self.entries:
+            if entry.city:
+                self._city_provinces.setdefault(entry.city, set()).add(entry.province)
+
+    def resolve(self, address):
+        """
+        返回地址可能对应的法院列表（按省份、城市筛选后去重），没有匹配时为空列表。
+        只有出现在区县名称之前的省份、城市才参与筛选（之后的多为路名，如 "北京大街"），
+        城市还须与已找到的省份相符。
+        """
+        provinces = set()
+        cities = []
+        district_roles = None
+        for _, _, name in self._index.find_all(address):
+            roles = self._index.district_to_court[name]
+            if any(kind == "district" for kind, _ in roles):
+                district_roles = roles
+                break
+            for kind, value in roles:
+                if kind == "province":
+                    provinces.add(value)
+                else:
+                    cities.append(value)
+        if district_roles is None:
+            return []
+
+        found = {
+            "province": provinces,
+            "city": {
+                city for city in cities
+                if not provinces or self._city_provinces[city] & provinces or "" in self._city_provinces[city]
+            },
+        }
+        candidates = [self.entries[i] for kind, i in district_roles if kind == "district"]
+        for kind in ("province", "city"):
+            if found[kind]:
+                narrowed = [
+                    entry for entry in candidates
+                    if not getattr(entry, kind) or getattr(entry, kind) in found[kind]
+                ]
+                if narrowed:
+                    candidates = narrowed
+        return list(dict.fromkeys(entry.court for entry in candidates))
+
+    def match(self, address):
+        """返回地址对应的法院；有多个可能时返回 "歧义：A|B"，未匹配时返回 "无" """
+        courts = self.resolve(address)
+        if not courts:
+            return "无"
+        if len(courts) == 1:
+            return courts[0]
+        return AMBIGUOUS_PREFIX + "|".join(courts)
+
+def _region_aliases(name):
+    """省份 / 城市名称及其省略后缀的简称（简称至少两个字）"""
+    yield name
+    for suffix in REGION_SUFFIXES:
+        if name.endswith(suffix):
+            if len(name) - len(suffix) >= 2:
+                yield name[:-len(suffix)]
+            break
+
+def _split_regions(region_str):
+    """将管辖区域字段拆分成单独的区名列表"""
+    # 将可能的引号去掉（如果 CSV 某些字段带了引号）
+    region_str = region_str.strip().strip('"').strip("'")
+
+    # 拆分成单独区名
+    # 假设使用中文顿号 "、" 或英文逗号 "," 或混合为分隔符时：
+    # 这里我们优先匹配中文顿号，也做一个冗余替换，把英文逗号也替换成中文顿号再分
+    region_str = region_str.replace(",", "、")
+    return [r.strip() for r in region_str.split("、") if r.strip()]
+
+def normalize_address(address):
+    """
+    规范化地址：全角字符转为半角（NFKC），去掉空白和标点。
+    写法略有不同的同一地址（如 "北京市 朝阳区，建国路１号" 与 "北京市朝阳区建国路1号"）规范化后相同。
+    """
+    return _NOISE_PATTERN.sub("", unicodedata.normalize("NFKC", address))
+
+class AddressMatcher:
+    """
+    带缓存的地址匹配：地址先规范化，再查询 "规范化地址 -> 法院" 的 LRU 缓存，
+    重复出现的地址只需一次字典查找。缓存最多保留 memo_size 个地址。
+    """
+
+    def __init__(self, index, memo_size=MEMO_SIZE):
+        self.index = index
+        self._match = lru_cache(maxsize=memo_size)(index.match)
+
+    def match(self, address):
+        return self._match(normalize_address(address))
+
+    @property
+    def hits(self):
+        return self._match.cache_info().hits
+
+    @property
+    def misses(self):
+        return self._match.cache_info().misses
 
 def load_district_mapping(mapping_file):
     """
@@ -33,22 +302,75 @@ def load_district_mapping(mapping_file):
         reader = csv.DictReader(f)
         for row in reader:
             court_name = row["基层人民法院"].strip()  # 例如 "北京市东城区人民法院"
-            region_str = row["管辖区域"].strip()      # 例如 "东城区、通州区、顺义区、怀柔区、平谷区、密云区"
-
-            # 将可能的引号去掉（如果 CSV 某些字段带了引号）
-            region_str = region_str.strip('"').strip("'")
-
-            # 拆分成单独区名
-            # 假设使用中文顿号 "、" 或英文逗号 "," 或混合为分隔符时：
-            # 这里我们优先匹配中文顿号，也做一个冗余替换，把英文逗号也替换成中文顿号再分
-            region_str = region_str.replace(",", "、")
-            region_list = [r.strip() for r in region_str.split("、") if r.strip()]
-
-            for district in region_list:
+            # 例如 "东城区、通州区、顺义区、怀柔区、平谷区、密云区"
+            for district in _split_regions(row["管辖区域"]):
                 district_to_court[district] = court_name
     
     return district_to_court
 
+def load_court_index(mapping_file, use_cache=True):
+    """
+    读取辖区法院明细并构建分级索引（CourtIndex）。
+    构建好的索引缓存在程序目录的 cache/court_index 中，以明细文件内容的哈希命名，
+    明细未变化时直接读取缓存；明细修改后哈希不同，自动重新构建。
+    除 "基层人民法院"、"管辖区域" 两列外，可选 "省份"、"城市" 两列:
+
+        省份,城市,基层人民法院,管辖区域
+        北京市,北京市,北京市朝阳区人民法院,朝阳区
+        吉林省,长春市,长春市朝阳区人民法院,朝阳区
+
+    没有这两列时，重名的区县不再互相覆盖，匹配时报告为歧义。
+    """
+    cache_dir = get_cache_dir("court_index") if use_cache else None
+    if cache_dir is None:
+        # 不使用缓存，或缓存目录无法创建
+        return _build_court_index(mapping_file)
+
+    cache_path = os.path.join(cache_dir, f"v{INDEX_CACHE_VERSION}_{file_hash(mapping_file)}{INDEX_CACHE_SUFFIX}")
+    if os.path.isfile(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                index = pickle.load(f)
+        except Exception:
+            # 缓存损坏或不兼容，重新构建
+            pass
+        else:
+            os.utime(cache_path)  # 记录最近使用时间
+            return index
+
+    index = _build_court_index(mapping_file)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # 写缓存失败不影响本次匹配
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    else:
+        evict_lru(cache_dir, INDEX_CACHE_MAX_BYTES, INDEX_CACHE_SUFFIX)
+    return index
+
+def _build_court_index(mapping_file):
+    """解析辖区法院明细并构建 CourtIndex"""
+    entries = []
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            province = (row.get("省份") or "").strip()
+            city = (row.get("城市") or "").strip()
+            court_name = row["基层人民法院"].strip()
+            for district in _split_regions(row["管辖区域"]):
+                entries.append(CourtEntry(province, city, district, court_name))
+    return CourtIndex(entries)
+
+def _as_index(district_to_court):
+    """dict 构建为 DistrictIndex，已构建的索引（DistrictIndex / CourtIndex）原样返回"""
+    if isinstance(district_to_court, (DistrictIndex, CourtIndex)):
+        return district_to_court
+    return DistrictIndex(district_to_court)
+
 def load_addresses(address_file):
     """
     从 address_list.txt 逐行读取地址
@@ -65,30 +387,16 @@ def match_addresses_to_court(addresses, district_to_court):
     """
     根据 district_to_court 映射，对地址进行批量匹配。
     如果地址中包含某个区名(如 "东城区")，返回映射的法院；否则返回 "无"。
-    
+    district_to_court 可以是 load_district_mapping 返回的 dict，
+    也可以是预先构建好的 DistrictIndex 或 CourtIndex（多次匹配时避免重复构建索引）。
+
     注意：
     - 脚本假设地址中必定含 "xx区" 字样才能匹配，比如 "朝阳区"、"海淀区" 等。
-    - 如果一个地址里出现多个区名，按需求可做自定义处理。
-      这里假设一个地址只会匹配到一个区(或第一个匹配到的区)。
+    - 如果一个地址里出现多个区名，取最左最长的区名；
+      需要找出全部区名时可使用 DistrictIndex.find_all。
     """
-    if not district_to_court:
-        return [(addr, "无") for addr in addresses]
-    
-    # 构造正则：将所有可能出现的区名用 “|” 拼接
-    # 例如 "东城区|通州区|顺义区|怀柔区|平谷区|密云区|西城区|..."
-    pattern_keys = list(district_to_court.keys())
-    pattern = re.compile("|".join(re.escape(k) for k in pattern_keys))
-
-    results = []
-    for addr in addresses:
-        match = pattern.search(addr)
-        if match:
-            matched_district = match.group(0)  # 如 "东城区"
-            court = district_to_court.get(matched_district, "无")
-        else:
-            court = "无"
-        results.append((addr, court))
-    return results
+    matcher = AddressMatcher(_as_index(district_to_court))
+    return [(addr, matcher.match(addr)) for addr in addresses]
 
 def save_results_to_csv(results, output_file):
     """
@@ -102,21 +410,174 @@ def save_results_to_csv(results, output_file):
         for addr, court in results:
             writer.writerow([addr, court])
 
+def _match_byte_range(address_file, start, end, index, f_out, progress_callback=None):
+    """
+    匹配地址文件中 [start, end) 字节范围内的地址（两端都位于行首），结果写入 f_out（不含表头）。
+    文件通过 mmap 读取，不会整体复制到内存。返回 MatchStats。
+    """
+    writer = csv.writer(f_out)
+    matcher = AddressMatcher(index)
+    count = 0
+    with open(address_file, 'rb') as f_in, mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        mm.seek(start)
+        while mm.tell() < end:
+            address = mm.readline().decode('utf-8').strip()
+            if not address:
+                continue
+            writer.writerow([address, matcher.match(address)])
+            count += 1
+            if progress_callback and count % PROGRESS_INTERVAL == 0:
+                progress_callback(mm.tell(), end)
+    return MatchStats(count, matcher.hits, matcher.misses)
+
+def split_shards(address_file, shard_count):
+    """
+    将地址文件按字节切分为最多 shard_count 段，每段的边界都对齐到行首。
+    返回 [(起始字节, 结束字节)]，空文件返回空列表。
+    """
+    size = os.path.getsize(address_file)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(address_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, shard_count):
+            pos = mm.find(b"\n", max(size * i // shard_count, bounds[-1]))
+            if pos < 0 or pos + 1 >= size:
+                break
+            bounds.append(pos + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+# 子进程中的索引，由 _init_match_worker 在进程启动时接收一次
+_worker_index = None
+
+def _init_match_worker(index):
+    global _worker_index
+    _worker_index = index
+
+def _match_shard(address_file, start, end, shard_file):
+    """在子进程中匹配一段地址，结果写入 shard_file，返回 MatchStats"""
+    with open(shard_file, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as f_out:
+        return _match_byte_range(address_file, start, end, _worker_index, f_out)
+
+def _match_parallel(address_file, index, f_out, workers, progress_callback=None):
+    """
+    多进程匹配：文件按行切分为若干段，每段由子进程匹配并写入临时文件，
+    全部完成后按原顺序拼接到 f_out。返回各段合计的 MatchStats（缓存在各进程中独立）。
+    """
+    total_bytes = os.path.getsize(address_file)
+    # 分段数多于进程数，避免个别进程分到较慢的段时其余进程空等
+    shards = split_shards(address_file, workers * 4)
+    output_dir = os.path.dirname(os.path.abspath(f_out.name))
+    shard_dir = tempfile.mkdtemp(prefix=".court_match_", dir=output_dir)
+    try:
+        shard_files = [os.path.join(shard_dir, f"{i:05d}.csv") for i in range(len(shards))]
+        totals = [0, 0, 0]
+        done_bytes = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker,
+                                 initargs=(index,)) as executor:
+            futures = {
+                executor.submit(_match_shard, address_file, start, end, shard_file): end - start
+                for (start, end), shard_file in zip(shards, shard_files)
+            }
+            for future in as_completed(futures):
+                for i, value in enumerate(future.result()):
+                    totals[i] += value
+                done_bytes += futures[future]
+                if progress_callback:
+                    progress_callback(done_bytes, total_bytes)
+
+        f_out.flush()
+        for shard_file in shard_files:
+            with open(shard_file, 'rb') as f_shard:
+                shutil.copyfileobj(f_shard, f_out.buffer, WRITE_BUFFER_SIZE)
+        return MatchStats(*totals)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+def match_addresses_to_csv(address_file, district_to_court, output_file, progress_callback=None, workers=1):
+    """
+    流式匹配：逐行读取地址、匹配并写入 CSV，内存占用与地址数量无关，结果边匹配边写出。
+    输出格式与 save_results_to_csv 相同。
+
+    district_to_court: 区名 -> 法院的 dict，或已构建的 DistrictIndex / CourtIndex
+    progress_callback: 形式为 progress_callback(已处理字节数, 文件总字节数)
+    workers: 大于 1 且文件较大时使用多进程并行匹配，结果仍按原始顺序输出
+    地址先规范化（见 normalize_address）再匹配，重复地址的结果取自缓存。
+    返回 MatchStats(地址数量, 缓存命中次数, 未命中次数)
+    """
+    index = _as_index(district_to_court)
+    total_bytes = os.path.getsize(address_file)
+    with open(output_file, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as f_out:
+        csv.writer(f_out).writerow(["Address", "Court"])
+        if total_bytes == 0:
+            stats = MatchStats(0, 0, 0)
+        elif workers > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+            stats = _match_parallel(address_file, index, f_out, workers, progress_callback)
+        else:
+            stats = _match_byte_range(address_file, 0, total_bytes, index, f_out, progress_callback)
+
+    if progress_callback:
+        progress_callback(total_bytes, total_bytes)
+    return stats
+
+def write_table(df, output_file):
+    """按扩展名将 DataFrame 写为 xlsx、CSV（带 BOM，Excel 可直接打开）、TSV 或 Parquet"""
+    ext = os.path.splitext(output_file)[1].lower()
+    if ext in DELIMITED_EXTENSIONS:
+        df.to_csv(output_file, sep=DELIMITED_EXTENSIONS[ext], index=False, encoding='utf-8-sig')
+    elif ext in PARQUET_EXTENSIONS:
+        df.to_parquet(output_file, index=False)
+    else:
+        df.to_excel(output_file, index=False)
+
+def match_table_column(table_file, address_column, district_to_court, output_file, result_column=RESULT_COLUMN):
+    """
+    匹配表格（xlsx、CSV、TSV 或 Parquet）中的地址列，把法院写入新列 result_column
+    （已存在时覆盖），整张表写入 output_file，可直接作为批量生成的数据文件。
+
+    整列一次读入、一次写出；列中不同的地址只匹配一次，再按列映射回每一行。
+    地址为空的行结果也为空。所有值都以字符串读写（与批量生成读取数据文件的方式一致）。
+    返回 MatchStats(非空地址数量, 重复地址数量, 实际匹配的地址数量)
+    """
+    df = read_table(table_file)
+    if address_column not in df.columns:
+        raise ValueError(f"数据文件中没有地址列：{address_column}")
+
+    matcher = AddressMatcher(_as_index(district_to_court))
+    addresses = df[address_column].str.strip()
+    unique = addresses[addresses != ""].unique()
+    courts = {address: matcher.match(address) for address in unique}
+    courts[""] = ""
+    df[result_column] = addresses.map(courts)
+    write_table(df, output_file)
+
+    count = int((addresses != "").sum())
+    return MatchStats(count, count - len(unique), len(unique))
+
 if __name__ == "__main__":
-    # 1) 根据实际文件路径进行修改
-    mapping_file = "district_mapping.csv"   # 包含 “基层人民法院,管辖区域” 两列
-    address_file = "address_list.txt"       # 每行一个地址
-    output_file = "match_results.csv"       # 输出结果文件
-    
-    # 2) 读取法院-管辖区域映射
-    district_to_court_map = load_district_mapping(mapping_file)
+    parser = argparse.ArgumentParser(description="根据辖区法院明细，匹配地址对应的基层人民法院")
+    parser.add_argument("--mapping", default="district_mapping.csv",
+                        help="辖区法院明细 CSV，包含 “基层人民法院,管辖区域” 两列，可选 “省份,城市” 两列")
+    parser.add_argument("--addresses", default="address_list.txt",
+                        help="地址文件，每行一个地址；指定 --column 时为 xlsx / CSV 表格")
+    parser.add_argument("--column", help="表格中地址列的列名，结果写入新列 “管辖法院”")
+    parser.add_argument("--output", default="match_results.csv", help="输出结果文件")
+    parser.add_argument("--workers", type=int, default=1, help="并行匹配的进程数")
+    parser.add_argument("--no-cache", action="store_true", help="不使用缓存的索引，重新解析辖区法院明细")
+    args = parser.parse_args()
 
-    # 3) 读取地址
-    addresses = load_addresses(address_file)
+    # 通过模块导入，缓存的索引中记录的类路径为 court_match.CourtIndex，与界面程序通用
+    import court_match
 
-    # 4) 批量匹配
-    matched_results = match_addresses_to_court(addresses, district_to_court_map)
+    # 1) 读取法院-管辖区域映射，构建分级索引
+    court_index = court_match.load_court_index(args.mapping, use_cache=not args.no_cache)
 
-    # 5) 结果输出到 CSV
-    save_results_to_csv(matched_results, output_file)
-    print(f"匹配完成，结果已写入 {output_file}")
\ No newline at end of file
+    # 2) 匹配表格中的地址列，或逐行读取地址、匹配并写入 CSV
+    if args.column:
+        stats = court_match.match_table_column(args.addresses, args.column, court_index, args.output)
+    else:
+        stats = court_match.match_addresses_to_csv(args.addresses, court_index, args.output,
+                                                   workers=args.workers)
+    print(f"匹配完成，共 {stats.count} 个地址，结果已写入 {args.output}")
+    print(f"地址缓存命中率：{stats.hits / max(stats.count, 1):.1%}")
@@ -3,6 +3,17 @@ from tkinter import filedialog
 
 from base_tab import BaseTab
 
+# 可选择的地址明细文件：每行一个地址的 TXT，或包含地址列的表格
+ADDRESS_FILE_TYPES = [
+    ("地址明细", "*.txt *.xlsx *.xls *.csv *.tsv"),
+    ("文本文件", "*.txt"),
+    ("表格文件", "*.xlsx *.xls *.csv *.tsv"),
+]
+
+# 输出文件允许的扩展名：TXT 地址明细只能输出 CSV，表格可输出 CSV 或 xlsx
+TEXT_OUTPUT_EXTENSIONS = (".csv",)
+TABLE_OUTPUT_EXTENSIONS = (".csv", ".xlsx")
+
 
 class CourtMatchTab(BaseTab):
     """
@@ -31,32 +42,54 @@ class CourtMatchTab(BaseTab):
             file_types=[("CSV文件", "*.csv")]
         )
 
-        # 选取"地址 TXT"按钮
+        # 选取"地址明细"按钮（TXT 或表格）
         self.address_btn, self.address_label, _ = self.create_file_selector(
             row=1,
-            button_text="选取地址明细 TXT",
-            label_text="未选择地址明细 TXT",
+            button_text="选取地址明细",
+            label_text="未选择地址明细（TXT 或 Excel / CSV 表格）",
             command=self.choose_address_file,
-            file_types=[("文本文件", "*.txt")]
+            file_types=ADDRESS_FILE_TYPES
         )
 
-        # 选取"输出 CSV"按钮
+        # 选取"输出文件"按钮（TXT 地址明细输出 CSV，表格可输出 CSV 或 xlsx）
         self.output_btn, self.output_label, _ = self.create_file_selector(
             row=2,
-            button_text="选择输出 CSV",
+            button_text="选择输出文件",
             label_text="未选择输出文件",
             command=self.choose_output_file
         )
 
+        # 匹配选项
+        self.options_frame = self.create_options_frame(row=3)
+        self.workers_var = self.add_spinbox_option(
+            self.options_frame,
+            row=0,
+            column=0,
+            label_text="并行进程数",
+            from_=1,
+            to=os.cpu_count() or 1,
+            default=1
+        )
+        self.address_column_var = self.add_entry_option(
+            self.options_frame,
+            row=0,
+            column=1,
+            label_text="地址列名（表格）",
+            default="地址"
+        )
+
         # "开始匹配"按钮
         self.match_btn = self.create_action_button(
-            row=3,
+            row=4,
             text="开始匹配",
             command=self.start_match
         )
 
+        # 进度条（默认未显示，开始匹配后显示）
+        self.progress_var, self.progress_bar = self.create_progress_bar()
+
         # 状态输出区
-        self.status_text = self.create_status_area(row=4)
+        self.status_text = self.create_status_area(row=6)
 
     def choose_mapping_file(self):
         """选择辖区法院明细CSV文件"""
@@ -69,20 +102,20 @@ class CourtMatchTab(BaseTab):
             self.mapping_label.config(text=os.path.basename(path))
 
     def choose_address_file(self):
-        """选择地址明细TXT文件"""
+        """选择地址明细文件（TXT 或表格）"""
         path = filedialog.askopenfilename(
-            title="选取地址明细 TXT 文件",
-            filetypes=[("文本文件", "*.txt")]
+            title="选取地址明细文件",
+            filetypes=ADDRESS_FILE_TYPES
         )
         if path:
             self.address_file = path
             self.address_label.config(text=os.path.basename(path))
 
     def choose_output_file(self):
-        """选择输出CSV文件"""
+        """选择输出文件（表格匹配时可选 xlsx）"""
         path = filedialog.asksaveasfilename(
-            title="输出结果 CSV",
-            filetypes=[("CSV 文件", "*.csv")],
+            title="输出结果",
+            filetypes=[("CSV 文件", "*.csv"), ("Excel 文件", "*.xlsx")],
             defaultextension=".csv"
         )
         if path:
@@ -92,25 +125,52 @@ class CourtMatchTab(BaseTab):
     def start_match(self):
         """开始匹配处理"""
         self.update_status("", clear=True)
+        self.progress_var.set(0)
 
         if not (self.mapping_file and self.address_file and self.output_file):
-            self.update_status("请先选择辖区明细 CSV、地址明细 TXT 和输出 CSV 路径！")
+            self.update_status("请先选择辖区明细 CSV、地址明细和输出文件路径！")
+            return
+
+        # TXT 地址明细逐行写出 CSV；表格按输出文件的扩展名写出
+        is_text = os.path.splitext(self.address_file)[1].lower() == ".txt"
+        output_ext = os.path.splitext(self.output_file)[1].lower()
+        allowed = TEXT_OUTPUT_EXTENSIONS if is_text else TABLE_OUTPUT_EXTENSIONS
+        if output_ext not in allowed:
+            self.update_status(f"{'TXT 地址明细' if is_text else '表格'}的匹配结果只能输出为 "
+                               f"{' / '.join(allowed)} 文件，请重新选择输出文件！")
             return
 
+        # 显示进度条
+        self.progress_bar.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="we")
+
+        def progress_callback(current, total):
+            """更新进度条的回调函数"""
+            self.progress_var.set(current / total * 100 if total else 100)
+            self.master.update_idletasks()
+
         try:
             # 执行匹配操作
-            load_district_mapping, load_addresses, match_addresses_to_court, save_results_to_csv = self.court_matcher
-
-            # 1) 读取区划映射
-            district_to_court_map = load_district_mapping(self.mapping_file)
-            # 2) 读取地址
-            addresses = load_addresses(self.address_file)
-            # 3) 匹配
-            matched_results = match_addresses_to_court(addresses, district_to_court_map)
-            # 4) 保存
-            save_results_to_csv(matched_results, self.output_file)
-
-            msg = f"匹配完成，结果已写入 {self.output_file}"
+            load_court_index, match_addresses_to_csv, match_table_column = self.court_matcher
+
+            # 1) 读取区划映射，构建分级索引
+            court_index = load_court_index(self.mapping_file)
+            if is_text:
+                # 2) 逐行读取地址、匹配并写入 CSV
+                stats = match_addresses_to_csv(self.address_file, court_index, self.output_file,
+                                               progress_callback=progress_callback,
+                                               workers=self.workers_var.get())
+                msg = (f"匹配完成，共 {stats.count} 个地址"
+                       f"（地址缓存命中率 {stats.hits / max(stats.count, 1):.1%}），结果已写入 {self.output_file}")
+            else:
+                # 2) 匹配表格中的地址列，结果写入新列后整表输出
+                address_column = self.address_column_var.get().strip()
+                if not address_column:
+                    self.update_status("请填写表格中地址列的列名！")
+                    return
+                stats = match_table_column(self.address_file, address_column, court_index, self.output_file)
+                progress_callback(1, 1)
+                msg = (f"匹配完成，共 {stats.count} 个地址（其中不同地址 {stats.misses} 个），"
+                       f"结果已写入 {self.output_file} 的 “管辖法院” 列")
             self.update_status(msg)
             self.show_message("提示", msg)
         except Exception as e:
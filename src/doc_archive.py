@@ -0,0 +1,67 @@
+import os
+import time
+from zipfile import ZIP_STORED, ZipFile
+
+
+class DocArchiveWriter:
+    """
+    将生成的文档依次写入输出目录下的 ZIP 压缩包，代替逐个创建小文件。
+
+    压缩包以生成时间命名（如 生成结果_20250408_153000.zip）。指定 max_bytes 时按大小分卷，
+    超出后自动切换到下一个压缩包（..._part001.zip、..._part002.zip ...）。
+    docx 本身已经是压缩格式，因此成员只存储不再压缩，写入就是一次顺序追加。
+    """
+
+    def __init__(self, output_dir, prefix="生成结果", max_bytes=None):
+        self.output_dir = output_dir
+        self.base_name = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.max_bytes = max_bytes
+        self.paths = []  # 已创建的压缩包路径
+
+        self._zip = None
+        self._size = 0
+        self._names = set()
+
+    def _open_next(self):
+        """关闭当前压缩包并新建下一个"""
+        self._close_current()
+        if self.max_bytes:
+            file_name = f"{self.base_name}_part{len(self.paths) + 1:03d}.zip"
+        else:
+            file_name = f"{self.base_name}.zip"
+        path = os.path.join(self.output_dir, file_name)
+        self._zip = ZipFile(path, "w", compression=ZIP_STORED)
+        self._size = 0
+        self._names = set()
+        self.paths.append(path)
+
+    def _close_current(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def add(self, file_name, data):
+        """向压缩包中写入一个文件"""
+        if self._zip is None or (self.max_bytes and self._names and self._size + len(data) > self.max_bytes):
+            self._open_next()
+
+        # 同一压缩包中不能有重名成员，重名时追加序号
+        name = file_name
+        stem, ext = os.path.splitext(file_name)
+        index = 1
+        while name in self._names:
+            name = f"{stem}_{index}{ext}"
+            index += 1
+
+        self._zip.writestr(name, data)
+        self._names.add(name)
+        self._size += len(data)
+
+    def close(self):
+        self._close_current()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
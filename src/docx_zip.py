@@ -0,0 +1,99 @@
+import struct
+import time
+import zlib
+from collections import namedtuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+# ZIP 中的一个成员：data 为已压缩（或仅存储）的原始数据
+RawZipEntry = namedtuple(
+    "RawZipEntry", ["name", "method", "flags", "crc", "compress_size", "file_size", "data"]
+)
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+
+_UTF8_FLAG = 0x800
+# 保留的通用标志位：压缩选项（bit 1、2）和 UTF-8 文件名（bit 11）
+_KEPT_FLAGS = 0x806
+
+
+def read_raw_entries(path):
+    """
+    读取 ZIP 文件中所有成员的原始（未解压）数据，按原顺序返回 RawZipEntry 列表。
+    """
+    entries = []
+    with ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            # 本地文件头之后才是数据，文件名和扩展字段长度以本地文件头为准
+            f.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            f.seek(header[9] + header[10], 1)
+            data = f.read(info.compress_size)
+            entries.append(RawZipEntry(
+                name=info.filename,
+                method=info.compress_type,
+                flags=info.flag_bits & _KEPT_FLAGS,
+                crc=info.CRC,
+                compress_size=info.compress_size,
+                file_size=info.file_size,
+                data=data,
+            ))
+    return entries
+
+
+def compress_entry(name, data, compresslevel=6):
+    """
+    将一个成员压缩为 RawZipEntry。
+    compresslevel 为 0 时仅存储不压缩，1-9 为 deflate 压缩级别。
+    """
+    if compresslevel == 0:
+        method, compressed = ZIP_STORED, data
+    else:
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+        method, compressed = ZIP_DEFLATED, compressor.compress(data) + compressor.flush()
+    flags = 0 if name.isascii() else _UTF8_FLAG
+    return RawZipEntry(name, method, flags, zlib.crc32(data), len(compressed), len(data), compressed)
+
+
+def _dos_datetime(timestamp=None):
+    """返回 ZIP 使用的 DOS 格式 (时间, 日期)"""
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def write_raw_zip(filename, entries):
+    """
+    将 RawZipEntry 序列直接写成 ZIP 文件，成员数据原样写入，不做任何解压或重新压缩。
+    filename 可以是路径或文件对象。
+    """
+    dos_time, dos_date = _dos_datetime()
+    central_dir = []
+
+    f = open(filename, "wb") if isinstance(filename, str) else filename
+    try:
+        offset = f.tell()
+        for entry in entries:
+            name = entry.name.encode("utf-8")
+            f.write(_LOCAL_HEADER.pack(
+                0x04034b50, 20, entry.flags, entry.method, dos_time, dos_date,
+                entry.crc, entry.compress_size, entry.file_size, len(name), 0
+            ))
+            f.write(name)
+            f.write(entry.data)
+            central_dir.append(_CENTRAL_HEADER.pack(
+                0x02014b50, 20, 20, entry.flags, entry.method, dos_time, dos_date,
+                entry.crc, entry.compress_size, entry.file_size, len(name), 0, 0, 0, 0, 0, offset
+            ) + name)
+            offset += _LOCAL_HEADER.size + len(name) + entry.compress_size
+
+        central_dir_size = sum(len(record) for record in central_dir)
+        f.write(b"".join(central_dir))
+        f.write(_END_OF_CENTRAL_DIR.pack(
+            0x06054b50, 0, 0, len(central_dir), len(central_dir), central_dir_size, offset, 0
+        ))
+    finally:
+        if f is not filename:
+            f.close()
@@ -3,6 +3,49 @@ from tkinter import filedialog
 
 from base_tab import BaseTab
 
+# 界面显示名称 -> generate_docs 的 engine 参数
+ENGINE_OPTIONS = {
+    "标准 (docxtpl)": "docxtpl",
+    "预编译模板": "compiled",
+}
+
+# 界面显示名称 -> generate_docs 的 output_mode 参数
+OUTPUT_MODE_OPTIONS = {
+    "目录": "directory",
+    "压缩包": "archive",
+    "合并为单个文档": "merge",
+}
+
+# 界面显示名称 -> generate_docs 的 output_format 参数
+OUTPUT_FORMAT_OPTIONS = {
+    "Word (docx)": "docx",
+    "PDF": "pdf",
+    "Word + PDF": "both",
+}
+
+# 界面显示名称 -> generate_docs 的 merge_separator 参数
+MERGE_SEPARATOR_OPTIONS = {
+    "分页符": "page",
+    "分节符": "section",
+}
+
+# 界面显示名称 -> generate_docs 的 compresslevel 参数（仅预编译模板引擎有效）
+COMPRESSION_OPTIONS = {
+    "默认": None,
+    "仅存储": 0,
+    "最快压缩": 1,
+    "标准压缩": 6,
+    "最小体积": 9,
+}
+
+# 可选择的数据文件类型
+DATA_FILE_TYPES = [
+    ("数据文件", "*.xlsx *.xls *.csv *.tsv *.parquet"),
+    ("Excel 文件", "*.xlsx *.xls"),
+    ("CSV / TSV 文件", "*.csv *.tsv"),
+    ("Parquet 文件", "*.parquet"),
+]
+
 
 class GenerateTab(BaseTab):
     """
@@ -17,6 +60,7 @@ class GenerateTab(BaseTab):
         self.template_path = ""
         self.excel_path = ""
         self.output_dir = ""
+        self.template_dir = ""
 
         self.create_widgets()
 
@@ -31,13 +75,13 @@ class GenerateTab(BaseTab):
             file_types=[("Word 文件", "*.docx")]
         )
 
-        # 选择 Excel 数据
+        # 选择数据文件（Excel / CSV / TSV / Parquet）
         self.excel_btn, self.excel_label, _ = self.create_file_selector(
             row=1,
-            button_text="选择 Excel 数据",
-            label_text="未选择 Excel",
+            button_text="选择数据文件",
+            label_text="未选择数据文件",
             command=self.choose_excel,
-            file_types=[("Excel 文件", "*.xlsx *.xls")]
+            file_types=DATA_FILE_TYPES
         )
 
         # 选择输出目录
@@ -48,18 +92,144 @@ class GenerateTab(BaseTab):
             command=self.choose_output_dir
         )
 
+        # 选择模板目录（可选，配合 Excel 中的 "模板" 列按行选择模板）
+        self.template_dir_btn, self.template_dir_label, _ = self.create_file_selector(
+            row=3,
+            button_text="选择模板目录（可选）",
+            label_text="未选择模板目录，所有记录使用同一模板",
+            command=self.choose_template_dir
+        )
+
+        # 生成选项
+        self.options_frame = self.create_options_frame(row=4)
+        self.workers_var = self.add_spinbox_option(
+            self.options_frame,
+            row=0,
+            column=0,
+            label_text="并行进程数",
+            from_=1,
+            to=os.cpu_count() or 1,
+            default=1
+        )
+        self.engine_var = self.add_combobox_option(
+            self.options_frame,
+            row=0,
+            column=1,
+            label_text="渲染引擎",
+            values=list(ENGINE_OPTIONS),
+            default="标准 (docxtpl)"
+        )
+        self.compression_var = self.add_combobox_option(
+            self.options_frame,
+            row=1,
+            column=0,
+            label_text="压缩级别",
+            values=list(COMPRESSION_OPTIONS),
+            default="默认"
+        )
+        self.streaming_var = self.add_checkbox_option(
+            self.options_frame,
+            row=1,
+            column=1,
+            label_text="流式读取数据（适合超大文件）"
+        )
+        self.output_mode_var = self.add_combobox_option(
+            self.options_frame,
+            row=2,
+            column=0,
+            label_text="输出方式",
+            values=list(OUTPUT_MODE_OPTIONS),
+            default="目录"
+        )
+        self.archive_max_mb_var = self.add_spinbox_option(
+            self.options_frame,
+            row=2,
+            column=1,
+            label_text="压缩包分卷(MB，0=不分卷)",
+            from_=0,
+            to=100000,
+            default=0
+        )
+        self.merge_separator_var = self.add_combobox_option(
+            self.options_frame,
+            row=3,
+            column=0,
+            label_text="合并分隔方式",
+            values=list(MERGE_SEPARATOR_OPTIONS),
+            default="分页符"
+        )
+        self.merge_max_records_var = self.add_spinbox_option(
+            self.options_frame,
+            row=3,
+            column=1,
+            label_text="每个合并文档记录数(0=不限)",
+            from_=0,
+            to=1000000,
+            default=0
+        )
+        self.template_cache_size_var = self.add_spinbox_option(
+            self.options_frame,
+            row=4,
+            column=0,
+            label_text="模板缓存数量",
+            from_=1,
+            to=100,
+            default=8
+        )
+        self.image_width_var = self.add_spinbox_option(
+            self.options_frame,
+            row=4,
+            column=1,
+            label_text="图片宽度(毫米，0=原始大小)",
+            from_=0,
+            to=1000,
+            default=0
+        )
+        self.incremental_var = self.add_checkbox_option(
+            self.options_frame,
+            row=5,
+            column=0,
+            label_text="增量生成（跳过未变化的记录，可中断后续跑）"
+        )
+        self.data_cache_mb_var = self.add_spinbox_option(
+            self.options_frame,
+            row=5,
+            column=1,
+            label_text="数据缓存上限(MB，0=不缓存)",
+            from_=0,
+            to=100000,
+            default=512
+        )
+        self.output_format_var = self.add_combobox_option(
+            self.options_frame,
+            row=6,
+            column=0,
+            label_text="输出格式",
+            values=list(OUTPUT_FORMAT_OPTIONS),
+            default="Word (docx)"
+        )
+        self.pdf_workers_var = self.add_spinbox_option(
+            self.options_frame,
+            row=6,
+            column=1,
+            label_text="PDF 转换进程数",
+            from_=1,
+            to=os.cpu_count() or 1,
+            default=1
+        )
+
         # 进度条（默认未显示，开始生成后显示）
         self.progress_var, self.progress_bar = self.create_progress_bar()
 
         # 生成按钮
         self.generate_btn = self.create_action_button(
-            row=4,
+            row=6,
             text="开始生成",
             command=self.start_generate
         )
 
         # 状态输出区
-        self.status_text = self.create_status_area(row=5)
+        self.status_text = self.create_status_area(row=7)
 
     def choose_template(self):
         """选择Word模板文件"""
@@ -72,10 +242,10 @@ class GenerateTab(BaseTab):
             self.template_label.config(text=os.path.basename(path))
 
     def choose_excel(self):
-        """选择Excel数据文件"""
+        """选择数据文件"""
         path = filedialog.askopenfilename(
-            title="选择 Excel 文件",
-            filetypes=[("Excel 文件", "*.xlsx *.xls")]
+            title="选择数据文件",
+            filetypes=DATA_FILE_TYPES
         )
         if path:
             self.excel_path = path
@@ -88,17 +258,24 @@ class GenerateTab(BaseTab):
             self.output_dir = dir_
             self.output_dir_label.config(text=dir_)
 
+    def choose_template_dir(self):
+        """选择模板目录"""
+        dir_ = filedialog.askdirectory(title="选择模板目录")
+        if dir_:
+            self.template_dir = dir_
+            self.template_dir_label.config(text=dir_)
+
     def start_generate(self):
         """开始生成文档"""
         self.update_status("", clear=True)
         self.progress_var.set(0)
 
         if not (self.template_path and self.excel_path and self.output_dir):
-            self.update_status("请先选择 Word 模板、Excel 文件和输出目录！")
+            self.update_status("请先选择 Word 模板、数据文件和输出目录！")
             return
 
         # 显示进度条
-        self.progress_bar.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="we")
+        self.progress_bar.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="we")
 
         def progress_callback(current, total):
             """更新进度条的回调函数"""
@@ -111,7 +288,23 @@ class GenerateTab(BaseTab):
                 self.template_path,
                 self.excel_path,
                 self.output_dir,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                workers=self.workers_var.get(),
+                engine=ENGINE_OPTIONS[self.engine_var.get()],
+                compresslevel=COMPRESSION_OPTIONS[self.compression_var.get()],
+                streaming=self.streaming_var.get(),
+                status_callback=self.update_status,
+                incremental=self.incremental_var.get(),
+                output_mode=OUTPUT_MODE_OPTIONS[self.output_mode_var.get()],
+                archive_max_mb=self.archive_max_mb_var.get(),
+                merge_separator=MERGE_SEPARATOR_OPTIONS[self.merge_separator_var.get()],
+                merge_max_records=self.merge_max_records_var.get(),
+                template_dir=self.template_dir or None,
+                template_cache_size=self.template_cache_size_var.get(),
+                image_width_mm=self.image_width_var.get() or None,
+                data_cache_mb=self.data_cache_mb_var.get(),
+                output_format=OUTPUT_FORMAT_OPTIONS[self.output_format_var.get()],
+                pdf_workers=self.pdf_workers_var.get()
             )
             self.update_status(msg)
             self.show_message("提示", msg)
@@ -1,35 +1,51 @@
+import multiprocessing
 import os
 import platform
 import sys
 import tkinter as tk
 import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import ttk, messagebox
 
 import pandas as pd
-from docxtpl import DocxTemplate
 
+from cache_utils import get_app_dir
 from conversion_tab import ConversionTab
 # 引入 court_match.py 中的功能
-from court_match import (
-    load_district_mapping,
-    load_addresses,
-    match_addresses_to_court,
-    save_results_to_csv
-)
+from court_match import load_court_index, match_addresses_to_csv, match_table_column
+from compiled_template import CompiledTemplate
 from court_match_tab import CourtMatchTab
+from doc_archive import DocArchiveWriter
 # 引入自定义模块
 from generate_tab import GenerateTab
+from merged_document import MergedDocumentWriter
+from pdf_converter import PdfConversionQueue, find_libreoffice_path
+from render_worker import (
+    TEMPLATE_COLUMN,
+    ImageCache,
+    RenderOptions,
+    TemplateCache,
+    attach_images,
+    has_image_columns,
+    init_worker,
+    iter_chunks,
+    list_templates,
+    render_chunk,
+    render_row,
+    resolve_doc_name,
+    select_template,
+    template_variables
+)
+from row_source import open_rows, read_header
+from run_manifest import RunManifest, context_hash, file_hash
+from table_cache import TableCache
 
 
 def setup_exception_logging():
     """设置全局异常日志记录"""
     # 获取应用程序的数据目录
-    if getattr(sys, 'frozen', False):
-        # 如果是打包的应用程序
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # 如果是直接运行的脚本
-        app_dir = os.path.dirname(os.path.abspath(__file__))
+    app_dir = get_app_dir()
 
     # 创建日志目录
     log_dir = os.path.join(app_dir, 'logs')
@@ -60,60 +76,325 @@ def setup_exception_logging():
     sys.excepthook = exception_handler
 
 
-def generate_docs(template_path, excel_path, output_dir, progress_callback=None):
+def _project_columns(template_paths, excel_path, status_callback=None, extra_columns=()):
+    """
+    根据模板中用到的变量确定需要读取的列（另加 "文件名" 列和 extra_columns）。
+    缺失的变量和未使用的列通过 status_callback 提示，返回需要读取的列名集合。
+    """
+    variables = set()
+    for path in template_paths:
+        variables |= template_variables(path)
+    keep = {"文件名", *extra_columns}
+    header = read_header(excel_path)
+    header_names = {str(col) for col in header}
+
+    missing = sorted(variables - header_names)
+    unused = [str(col) for col in header if str(col) not in variables and col not in keep]
+    if status_callback:
+        if missing:
+            status_callback(f"警告：Excel 中缺少模板变量对应的列（将渲染为空）：{'、'.join(missing)}")
+        if unused:
+            status_callback(f"以下列未在模板中使用，已跳过：{'、'.join(unused)}")
+
+    return {col for col in header if str(col) in variables or col in keep}
+
+
+def _render_serial(template_path, rows, output_dir, options, on_rows_done):
+    """
+    在当前进程中逐行渲染，每完成一行调用一次 on_rows_done([行], [(文件名, 内容)])。
+    output_dir 为 None 时不写文件，由 on_rows_done 处理生成的内容。
+    返回模板缓存的 (命中次数, 未命中次数)。
+    """
+    # Word 模板和图片按需加载并缓存
+    cache = TemplateCache(options.engine, options.compresslevel, options.cache_size)
+    images = ImageCache()
+
+    for row_index, context in rows:
+        doc = cache.get(select_template(context, template_path, options.template_dir))
+        # 插入图片后的 context 只用于渲染，on_rows_done 收到原始数据行（增量生成按原始数据计算哈希）
+        render_context = attach_images(doc, context, images, options.image_dir, options.image_width_mm)
+        # 渲染模板并保存（文件名取 "文件名" 列，没有就用序号命名）
+        result = render_row(doc, render_context, row_index, output_dir)
+        on_rows_done([(row_index, context)], [result])
+    return cache.hits, cache.misses
+
+
+def _render_merged(template_path, rows, output_dir, separator, max_records, on_rows_done):
+    """将所有数据行渲染进合并文档，返回生成的文件路径列表"""
+    compiled = CompiledTemplate(template_path)
+    with MergedDocumentWriter(compiled, output_dir, separator=separator, max_records=max_records) as writer:
+        for row_index, context in rows:
+            writer.add(context)
+            on_rows_done([(row_index, context)], [])
+    return writer.paths
+
+
+def _render_parallel(template_path, rows, output_dir, chunk_size, workers, options, on_rows_done):
+    """
+    使用进程池并行渲染。
+    数据行按块分发给工作进程，每个进程只加载一次模板；
+    按提交顺序回收结果，对每个完成的块调用 on_rows_done(块, 结果)，保证进度仍按顺序更新。
+    返回所有工作进程模板缓存的 (命中次数, 未命中次数)。
+    """
+    pending = deque()
+    hits = misses = 0
+
+    def collect():
+        nonlocal hits, misses
+        future, chunk = pending.popleft()
+        results, (chunk_hits, chunk_misses) = future.result()
+        hits += chunk_hits
+        misses += chunk_misses
+        on_rows_done(chunk, results)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(template_path, options)) as executor:
+        try:
+            for chunk in iter_chunks(rows, chunk_size):
+                pending.append((executor.submit(render_chunk, chunk, output_dir), chunk))
+                # 限制在途任务数量，避免一次性把所有数据行都塞进队列
+                if len(pending) >= workers * 2:
+                    collect()
+            while pending:
+                collect()
+        except Exception:
+            for future, _ in pending:
+                future.cancel()
+            raise
+    return hits, misses
+
+
+def generate_docs(template_path, excel_path, output_dir, progress_callback=None, workers=1, engine="docxtpl",
+                  compresslevel=None, streaming=False, status_callback=None, incremental=False,
+                  output_mode="directory", archive_max_mb=0, merge_separator="page", merge_max_records=0,
+                  template_dir=None, template_cache_size=8, image_width_mm=None, data_cache_mb=512,
+                  output_format="docx", pdf_workers=1):
     """
     使用 docxtpl + pandas 批量生成 Word 文档。
-    excel 的列名与模板 {{变量名}} 对应。
+    excel 的列名与模板 {{变量名}} 对应；excel_path 也可以是 CSV、TSV（自动识别 UTF-8 / GBK 编码）
+    或 Parquet（需要安装 pyarrow）文件，所有值都以字符串读入。
     progress_callback: 用于更新进度的回调函数，形式为 progress_callback(current, total)
+    workers: 并行渲染的进程数，大于 1 时使用进程池按块并行渲染
+    engine: 渲染引擎，"docxtpl"（默认）或 "compiled"（预编译模板，速度更快）
+    compresslevel: 仅对 compiled 引擎有效；不为 None 时模板中未改动的部件直接复制原始压缩数据，
+                   渲染后的 XML 按该级别压缩（0 为仅存储，1-9 为 deflate 级别）
+    streaming: 为 True 时逐行读取数据文件（xlsx 使用 openpyxl 只读模式，CSV 使用 csv 模块，Parquet 按批读取），
+               读到一行渲染一行，内存占用与行数无关
+    status_callback: 用于输出提示信息的回调函数，形式为 status_callback(text)
+    incremental: 为 True 时在输出目录中维护生成清单，跳过模板和数据都未变化且文件已存在的行，
+                 可用于中断后续跑
+    output_mode: "directory"（默认）每条记录保存为输出目录中的一个文件；
+                 "archive" 将所有文档依次写入输出目录下的 ZIP 压缩包；
+                 "merge" 将所有记录渲染进同一个 docx，便于批量打印
+    archive_max_mb: 压缩包分卷大小（MB），0 表示不分卷
+    merge_separator: 合并输出时记录之间的分隔，"page"（分页符）或 "section"（分节符）
+    merge_max_records: 合并输出时每个文档最多包含的记录数，0 表示不限
+    template_dir: 模板目录；指定后 Excel 中 "模板" 列不为空的行使用该目录下对应的模板，其余行使用 template_path
+    template_cache_size: 模板缓存最多保留的模板数量（每个进程各自缓存）
+    image_width_mm: 图片列插入图片的宽度（毫米），None 为图片原始大小。
+                    列名以 "_图片" 结尾的列为图片列，值为图片路径（相对路径相对于 Excel 所在目录），
+                    有图片列时使用 docxtpl 引擎渲染
+    data_cache_mb: 数据文件解析结果缓存的大小上限（MB），0 表示不使用缓存（流式读取时不使用缓存）。
+                   数据文件未变化时直接读取缓存的快照，不再重新解析
+    output_format: "docx"（默认）、"pdf" 或 "both"；后两者在生成的同时由 LibreOffice 把每个生成好的文档
+                   转换为 PDF，渲染与转换同时进行（仅支持输出到目录）。"pdf" 转换成功后删除 docx
+    pdf_workers: 同时运行的 LibreOffice 转换进程数
     """
+    manifest = None
+    archive = None
+    converter = None
     try:
         if not os.path.isfile(template_path):
             raise FileNotFoundError("Word 模板文件不存在！")
         if not os.path.isfile(excel_path):
-            raise FileNotFoundError("Excel 数据文件不存在！")
+            raise FileNotFoundError("数据文件不存在！")
         if not os.path.isdir(output_dir):
             raise NotADirectoryError("输出目录不存在！")
+        if output_mode not in ("directory", "archive", "merge"):
+            raise ValueError(f"未知的输出方式：{output_mode}")
+        if incremental and output_mode != "directory":
+            raise ValueError("增量生成仅支持输出到目录！")
+        if output_format not in ("docx", "pdf", "both"):
+            raise ValueError(f"未知的输出格式：{output_format}")
+        if output_format != "docx" and output_mode != "directory":
+            raise ValueError("转换为 PDF 仅支持输出到目录！")
+        if incremental and output_format == "pdf":
+            raise ValueError("增量生成需要保留 docx 文件，请选择同时输出 docx 和 PDF！")
+        if template_dir:
+            if not os.path.isdir(template_dir):
+                raise NotADirectoryError("模板目录不存在！")
+            if output_mode == "merge":
+                raise ValueError("合并输出不支持按行选择模板！")
+
+        # 所有可能用到的模板：默认模板，以及模板目录中的全部模板
+        template_paths = [template_path] + (list_templates(template_dir) if template_dir else [])
+
+        # 只读取模板中用到的列，开始渲染前提示缺失 / 未使用的列
+        usecols = _project_columns(template_paths, excel_path, status_callback,
+                                   extra_columns=[TEMPLATE_COLUMN] if template_dir else [])
+
+        # 图片列需要 docxtpl 的 InlineImage
+        if has_image_columns(usecols):
+            if output_mode == "merge":
+                raise ValueError("合并输出不支持图片列！")
+            if engine != "docxtpl":
+                engine = "docxtpl"
+                if status_callback:
+                    status_callback("数据中包含图片列，使用标准 (docxtpl) 引擎渲染。")
+
+        # 压缩级别只在预编译模板引擎逐个生成文档时使用
+        if compresslevel is not None and (engine != "compiled" or output_mode == "merge") and status_callback:
+            status_callback("压缩级别仅对预编译模板引擎有效，本次按默认压缩生成。")
+
+        options = RenderOptions(
+            engine=engine,
+            compresslevel=compresslevel,
+            template_dir=template_dir,
+            cache_size=template_cache_size,
+            image_dir=os.path.dirname(os.path.abspath(excel_path)),
+            image_width_mm=image_width_mm
+        )
 
-        # 读取 Excel（假设第一行是标题行，列名对应模板中的变量）
-        df = pd.read_excel(excel_path, dtype=str)  # 将所有列都以字符串方式读入
-        df.fillna("", inplace=True)  # 将所有的 NaN 变成空字符串
-
-        # 加载 Word 模板
-        doc = DocxTemplate(template_path)
-
-        # 行号计数，用于遇到空白文件名时兜底
-        row_index = 0
-        total = len(df)
-
-        for idx, row in df.iterrows():
-            # 构建 context 字典：key=列名, value=单元格内容
-            context = {}
-            for col in df.columns:
-                context[col] = row[col]
-
-            # 渲染模板
-            doc.render(context)
-
-            # 文件名列 —— 这里假设 Excel 中有 "文件名" 列，如果没有就用 index 命名
-            if "文件名" in df.columns and pd.notna(row["文件名"]):
-                doc_name = str(row["文件名"])
-            else:
-                doc_name = f"output_{row_index}"
-
-            row_index += 1
-
-            # 保存文件路径
-            save_path = os.path.join(output_dir, f"{doc_name}.docx")
-            doc.save(save_path)
-
-            # 更新进度
+        # 读取数据文件（第一行是标题行，列名对应模板中的变量；所有单元格都以字符串读入）
+        table_cache = TableCache(data_cache_mb * 1024 * 1024) if data_cache_mb and not streaming else None
+        total, rows = open_rows(excel_path, streaming=streaming, usecols=usecols, cache=table_cache)
+        if table_cache and table_cache.hits and status_callback:
+            status_callback("数据文件未变化，已使用缓存的解析结果。")
+
+        if output_format != "docx":
+            libreoffice_path = find_libreoffice_path()
+            if not libreoffice_path:
+                raise FileNotFoundError("无法找到 LibreOffice 可执行文件，无法转换为 PDF！")
+            converter = PdfConversionQueue(libreoffice_path, output_dir, workers=pdf_workers)
+
+        done = 0
+        skipped = 0
+        converted = 0
+        pdf_failed = []
+
+        def report_progress():
+            # 流式读取时总行数为估计值
             if progress_callback:
-                progress_callback(idx + 1, total)
-
-        return f"生成完毕，共处理 {total} 条记录！"
+                current = done + skipped
+                if converter:
+                    # 渲染和转换各占一半进度，跳过的记录不需要转换
+                    progress_callback(current + skipped + converted + len(pdf_failed), max(total, current) * 2)
+                else:
+                    progress_callback(current, max(total, current))
+
+        def on_pdf_results(results):
+            nonlocal converted
+            for file_path, pdf_path, error in results:
+                if error:
+                    pdf_failed.append(os.path.basename(file_path))
+                    if status_callback:
+                        status_callback(f"PDF 转换失败：{os.path.basename(file_path)}，错误信息：{error}")
+                    continue
+                converted += 1
+                if output_format == "pdf":
+                    os.remove(file_path)
+            if results:
+                report_progress()
+
+        if incremental:
+            # 任何一个模板变化都会使清单作废
+            manifest = RunManifest(output_dir, "|".join(file_hash(path) for path in template_paths))
+
+            def skip_up_to_date(rows):
+                nonlocal skipped
+                for row_index, context in rows:
+                    file_name = f"{resolve_doc_name(context, row_index)}.docx"
+                    if manifest.is_up_to_date(file_name, context_hash(context)):
+                        skipped += 1
+                        report_progress()
+                        continue
+                    yield row_index, context
+
+            rows = skip_up_to_date(rows)
+
+        if output_mode == "merge" and status_callback:
+            if engine != "compiled":
+                status_callback("合并输出使用预编译模板引擎渲染。")
+            if workers > 1:
+                status_callback("合并输出需按顺序写入同一文档，已改为单进程渲染。")
+
+        if output_mode == "archive":
+            archive = DocArchiveWriter(output_dir, max_bytes=archive_max_mb * 1024 * 1024)
+            render_dir = None  # 不写文件，渲染结果交给 archive
+        else:
+            render_dir = output_dir
+
+        def on_rows_done(chunk, results):
+            nonlocal done
+            if archive:
+                for file_name, data in results:
+                    archive.add(file_name, data)
+            if manifest:
+                for row_index, context in chunk:
+                    manifest.record(f"{resolve_doc_name(context, row_index)}.docx", context_hash(context))
+            done += len(chunk)
+            report_progress()
+            if converter:
+                # 生成好的文档立即交给后台转换
+                for file_name, _ in results:
+                    converter.submit(os.path.join(output_dir, file_name))
+                on_pdf_results(converter.poll())
+
+        merged_paths = []
+        cache_stats = None
+        if output_mode == "merge":
+            merged_paths = _render_merged(template_path, rows, output_dir, merge_separator, merge_max_records,
+                                          on_rows_done)
+        elif workers > 1 and total > 1:
+            chunk_size = max(1, min(200, total // (workers * 4)))
+            cache_stats = _render_parallel(template_path, rows, render_dir, chunk_size, workers, options,
+                                           on_rows_done)
+        else:
+            cache_stats = _render_serial(template_path, rows, render_dir, options, on_rows_done)
+
+        if converter:
+            # 等待剩余的 PDF 转换完成
+            for result in converter.drain():
+                on_pdf_results([result])
+
+        # 流式读取时估计的总行数可能偏大，结束时把进度补满
+        count = done + skipped
+        if progress_callback and count and count != total:
+            progress_callback(count, count)
+
+        if merged_paths:
+            names = "、".join(os.path.basename(path) for path in merged_paths)
+            msg = f"生成完毕，共处理 {count} 条记录，已合并为：{names}"
+        elif archive:
+            archive.close()
+            if len(archive.paths) > 1:
+                msg = (f"生成完毕，共处理 {count} 条记录，"
+                       f"已写入 {len(archive.paths)} 个压缩包：{archive.base_name}_part*.zip")
+            else:
+                names = "、".join(os.path.basename(path) for path in archive.paths)
+                msg = f"生成完毕，共处理 {count} 条记录，已写入压缩包：{names}"
+        elif skipped:
+            msg = f"生成完毕，共处理 {count} 条记录（其中 {skipped} 条未变化，已跳过）！"
+        else:
+            msg = f"生成完毕，共处理 {count} 条记录！"
+
+        if converter:
+            msg += f"\n已转换 PDF {converted} 个"
+            if pdf_failed:
+                msg += f"，转换失败 {len(pdf_failed)} 个（已保留 docx）：{'、'.join(pdf_failed)}"
+        if template_dir and cache_stats:
+            msg += f"\n模板缓存：命中 {cache_stats[0]} 次，未命中 {cache_stats[1]} 次"
+        return msg
 
     except Exception as e:
         raise e
+    finally:
+        if manifest:
+            manifest.close()
+        if archive:
+            archive.close()
+        if converter:
+            converter.close()
 
 
 def main():
@@ -124,7 +405,7 @@ def main():
     # 创建主窗口
     root = tk.Tk()
     root.title("office-tools")
-    root.geometry("600x450")
+    root.geometry("720x720")
 
     # 使窗口可调整大小时，内容也随之调整
     root.columnconfigure(0, weight=1)
@@ -141,7 +422,7 @@ def main():
         # Tab2: 辖区法院匹配
         court_match_tab = CourtMatchTab(
             notebook,
-            court_matcher=(load_district_mapping, load_addresses, match_addresses_to_court, save_results_to_csv)
+            court_matcher=(load_court_index, match_addresses_to_csv, match_table_column)
         )
         notebook.add(court_match_tab, text="辖区法院匹配")
 
@@ -163,4 +444,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序使用多进程时必须调用
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,101 @@
+import os
+import time
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+# 记录之间的分隔：分页符，或带有模板页面设置的分节符
+PAGE_BREAK = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+SEPARATORS = ("page", "section")
+
+
+class MergedDocumentWriter:
+    """
+    将多条记录渲染进同一个 docx（邮件合并式打印）。
+
+    每条记录只渲染正文，body 内容直接以流的方式追加写入 ZIP 中的 document.xml，
+    不会在内存中累积，也不需要先保存 N 个文件再拼接。
+    页眉、页脚、核心属性按每个合并文档的第一条记录渲染。
+    max_records 大于 0 时每写满该数量的记录就换一个新文件（..._001.docx、..._002.docx ...）。
+    """
+
+    def __init__(self, compiled, output_dir, prefix="合并结果", separator="page", max_records=0):
+        if separator not in SEPARATORS:
+            raise ValueError(f"未知的分隔方式：{separator}")
+        self.compiled = compiled
+        self.output_dir = output_dir
+        self.base_name = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.separator = separator
+        self.max_records = max_records
+        self.paths = []  # 已创建的合并文档路径
+
+        self._prefix, self._suffix = compiled.document_xml_parts()
+        self._zip = None
+        self._stream = None
+        self._records = 0
+        self._docpr_index = 1000
+        self._sect_pr = b""
+
+    def _open_next(self, context):
+        """关闭当前文档并新建下一个，除 document.xml 外的部件按 context 渲染后先写入"""
+        self._close_current()
+        if self.max_records:
+            file_name = f"{self.base_name}_{len(self.paths) + 1:03d}.docx"
+        else:
+            file_name = f"{self.base_name}.docx"
+        path = os.path.join(self.output_dir, file_name)
+
+        self._zip = ZipFile(path, "w", compression=ZIP_DEFLATED)
+        for name, blob in self.compiled.iter_members(self.compiled.render_parts(context)):
+            if name != self.compiled.document_member:
+                self._zip.writestr(name, blob)
+        self._stream = self._zip.open(self.compiled.document_member, "w", force_zip64=True)
+        self._stream.write(self._prefix)
+
+        self._records = 0
+        self._docpr_index = 1000
+        self.paths.append(path)
+
+    def _close_current(self):
+        if self._zip is None:
+            return
+        # 最后一节的页面设置放在 body 末尾
+        self._stream.write(self._sect_pr)
+        self._stream.write(self._suffix)
+        self._stream.close()
+        self._zip.close()
+        self._zip = None
+        self._stream = None
+
+    def add(self, context):
+        """渲染一条记录并追加到合并文档"""
+        if self._zip is None or (self.max_records and self._records >= self.max_records):
+            self._open_next(context)
+
+        body = self.compiled.render_body(context, self._docpr_index)
+        # docPr 编号在整个合并文档内不能重复
+        self._docpr_index += len(body.xpath("//wp:docPr", namespaces=nsmap))
+
+        children = list(body)
+        if children and children[-1].tag == qn("w:sectPr"):
+            self._sect_pr = etree.tostring(children.pop(), encoding="utf-8")
+
+        if self._records:
+            if self.separator == "section":
+                self._stream.write(b"<w:p><w:pPr>" + self._sect_pr + b"</w:pPr></w:p>")
+            else:
+                self._stream.write(PAGE_BREAK)
+        for child in children:
+            self._stream.write(etree.tostring(child, encoding="utf-8"))
+        self._records += 1
+
+    def close(self):
+        self._close_current()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,252 @@
+import argparse
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from pdf_converter import ConversionTimeout, find_libreoffice_path, kill_process_tree, new_process_group_kwargs
+
+# uno 模块随 LibreOffice 提供（或系统包 python3-uno），没有时只能使用命令行转换
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+
+def uno_available():
+    """当前 Python 环境能否使用 UNO"""
+    return uno is not None
+
+
+def _free_port():
+    """取一个本机空闲端口"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _properties(**kwargs):
+    """构造 UNO 调用所需的 PropertyValue 元组"""
+    props = []
+    for name, value in kwargs.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+def _call_with_timeout(func, timeout, *args):
+    """
+    在后台线程中执行 func，超过 timeout 秒未返回时抛出 TimeoutError。
+    UNO 调用在 LibreOffice 卡住时会一直阻塞，需要这样才能发现并处理。
+    """
+    result = {}
+
+    def target():
+        try:
+            result["value"] = func(*args)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"LibreOffice 在 {timeout} 秒内没有响应")
+    if "error" in result:
+        raise result["error"]
+    return result.get("value")
+
+
+class OfficeServer:
+    """
+    常驻的 headless LibreOffice（soffice --accept=socket,...），通过 UNO 在进程内打开并导出文档，
+    每个文件不再启动新的 LibreOffice 进程。
+
+    - 首次转换时自动启动，使用独立的临时配置目录；
+    - 每次转换前做健康检查（进程存活且 UNO 调用能及时返回），崩溃或卡住时自动重启；
+    - 转换超时会结束整个 LibreOffice 进程，下次转换时重新启动；
+    - 未指定超时时间时按文件大小和本服务已观察到的转换耗时估算（见 ConversionTimeout）；
+    - 程序退出时（atexit）自动关闭。
+    同一时刻只转换一个文件（内部加锁），可在多个线程中共用。
+    """
+
+    def __init__(self, libreoffice_path, host="127.0.0.1", port=None, start_timeout=30):
+        if uno is None:
+            raise ImportError("当前 Python 环境没有 LibreOffice 的 uno 模块，无法使用常驻服务")
+        self.libreoffice_path = libreoffice_path
+        self.host = host
+        self.port = port
+        self.start_timeout = start_timeout
+
+        self._fixed_port = port is not None
+        self._process = None
+        self._profile_dir = None
+        self._desktop = None
+        self._lock = threading.Lock()
+        # 常驻服务没有启动时间，耗时与命令行转换不同，单独估算
+        self.timeouts = ConversionTimeout()
+        atexit.register(self.stop)
+
+    def start(self):
+        """启动 LibreOffice 并等待 UNO 连接可用"""
+        self._profile_dir = tempfile.mkdtemp(prefix="office-tools-uno-")
+        if not self._fixed_port:
+            self.port = _free_port()
+        cmd = [
+            self.libreoffice_path,
+            "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"-env:UserInstallation={Path(self._profile_dir).as_uri()}",
+            f"--accept=socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext",
+        ]
+        self._process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                         **new_process_group_kwargs())
+
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                self._desktop = self._connect()
+                return
+            except Exception:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("LibreOffice 服务启动失败")
+                time.sleep(0.5)
+
+    def _connect(self):
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        context = resolver.resolve(
+            f"uno:socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext")
+        return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def is_healthy(self, timeout=5):
+        """进程仍在运行且能在 timeout 秒内响应 UNO 调用"""
+        if self._process is None or self._process.poll() is not None or self._desktop is None:
+            return False
+        try:
+            _call_with_timeout(self._desktop.getComponents, timeout)
+        except Exception:
+            return False
+        return True
+
+    def ensure_running(self):
+        """服务未启动、已退出或卡住时（重新）启动"""
+        if not self.is_healthy():
+            self.stop(graceful=False)
+            self.start()
+
+    def convert(self, file_path, output_dir, timeout=None):
+        """
+        将文件转换为 PDF，返回 PDF 路径，失败时抛出异常。
+        timeout 为 None 时按文件大小和历史耗时估算。
+        """
+        size = os.path.getsize(file_path) if os.path.isfile(file_path) else 0
+        if timeout is None:
+            timeout = self.timeouts.estimate(size)
+        with self._lock:
+            for attempt in range(2):
+                self.ensure_running()
+                started = time.monotonic()
+                try:
+                    pdf_path = _call_with_timeout(self._convert, timeout, file_path, output_dir)
+                    self.timeouts.observe(size, time.monotonic() - started)
+                    return pdf_path
+                except TimeoutError:
+                    # 文档卡住了 LibreOffice：直接结束进程，下次转换时重启，不再重试该文件
+                    self.stop(graceful=False)
+                    raise Exception(f"转换超时: {os.path.basename(file_path)}")
+                except Exception:
+                    # 文档本身的错误直接报告；服务崩溃时重启后重试一次
+                    if self.is_healthy() or attempt:
+                        raise
+                    self.stop(graceful=False)
+
+    def _convert(self, file_path, output_dir):
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        pdf_path = os.path.join(os.path.abspath(output_dir), f"{base_name}.pdf")
+        doc = self._desktop.loadComponentFromURL(
+            Path(file_path).absolute().as_uri(), "_blank", 0, _properties(Hidden=True))
+        if doc is None:
+            raise Exception(f"无法打开文件: {os.path.basename(file_path)}")
+        try:
+            doc.storeToURL(Path(pdf_path).as_uri(), _properties(FilterName="writer_pdf_Export"))
+        finally:
+            doc.close(True)
+        return pdf_path
+
+    def stop(self, graceful=True):
+        """
+        关闭 LibreOffice 并删除临时配置目录。
+        graceful 为 True 时先请求正常退出，不响应时再结束整个进程组；为 False 时直接结束。
+        """
+        process, desktop = self._process, self._desktop
+        self._process = None
+        self._desktop = None
+        if process is not None and process.poll() is None:
+            if not graceful:
+                kill_process_tree(process)
+            elif desktop is not None:
+                try:
+                    _call_with_timeout(desktop.terminate, 5)
+                except Exception:
+                    pass
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(process)
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+
+# 程序内共用的常驻服务，按 LibreOffice 路径区分
+_servers = {}
+
+
+def get_office_server(libreoffice_path):
+    """返回共用的 OfficeServer（首次调用时创建，首次转换时启动）"""
+    if libreoffice_path not in _servers:
+        _servers[libreoffice_path] = OfficeServer(libreoffice_path)
+    return _servers[libreoffice_path]
+
+
+def convert_files_with_server(server, files, output_dir, timeout=None):
+    """
+    使用常驻服务依次转换 files，逐个产生 (文件路径, PDF 路径或 None, 异常或 None)。
+    timeout 为 None 时每个文件的超时时间按文件大小和历史耗时估算。
+    """
+    for file_path in files:
+        try:
+            yield file_path, server.convert(file_path, output_dir, timeout=timeout), None
+        except Exception as e:
+            yield file_path, None, e
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="使用常驻的 LibreOffice 服务将 Word 文件批量转换为 PDF")
+    parser.add_argument("files", nargs="+", help="待转换的 Word 文件")
+    parser.add_argument("--outdir", default=".", help="PDF 输出目录")
+    parser.add_argument("--timeout", type=int, default=None, help="单个文件的转换超时（秒），默认按文件大小和历史耗时估算")
+    args = parser.parse_args()
+
+    libreoffice_path = find_libreoffice_path()
+    if not libreoffice_path:
+        raise SystemExit("无法找到 LibreOffice 可执行文件。")
+    server = OfficeServer(libreoffice_path)
+    try:
+        for file_path, pdf_path, error in convert_files_with_server(server, args.files, args.outdir, args.timeout):
+            if error is None:
+                print(f"已转换: {file_path} -> {pdf_path}")
+            else:
+                print(f"转换失败: {file_path}，错误信息: {error}")
+    finally:
+        server.stop()
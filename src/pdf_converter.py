@@ -0,0 +1,440 @@
+import os
+import platform
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+
+def find_libreoffice_path():
+    """
+    查找 LibreOffice 可执行文件的路径
+    返回可执行文件路径或 None（如果未找到）
+    """
+    # 常见的 LibreOffice 可执行文件路径
+    possible_paths = []
+
+    if platform.system() == "Darwin":  # macOS
+        possible_paths = [
+            "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+            "/Applications/OpenOffice.app/Contents/MacOS/soffice",
+            "/usr/local/bin/soffice"
+        ]
+    elif platform.system() == "Windows":  # Windows
+        possible_paths = [
+            r"C:\Program Files\LibreOffice\program\soffice.exe",
+            r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+            r"C:\Program Files\OpenOffice\program\soffice.exe",
+            r"C:\Program Files (x86)\OpenOffice\program\soffice.exe"
+        ]
+    else:  # Linux 和其他系统
+        possible_paths = [
+            "/usr/bin/soffice",
+            "/usr/local/bin/soffice",
+            "/opt/libreoffice/program/soffice"
+        ]
+
+    # 检查命令是否存在于 PATH 中
+    soffice_in_path = shutil.which("soffice")
+    if soffice_in_path:
+        possible_paths.insert(0, soffice_in_path)
+
+    # 检查每个可能的路径
+    for path in possible_paths:
+        if os.path.exists(path) and os.access(path, os.X_OK):
+            return path
+
+    return None
+
+
+def new_process_group_kwargs():
+    """
+    subprocess.Popen 的参数：让子进程在新的进程组中运行，
+    kill_process_tree 才能连同其子进程一起结束。
+    """
+    if os.name == "posix":
+        return {"start_new_session": True}
+    return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def kill_process_tree(process):
+    """
+    结束进程及其子进程（LibreOffice 的启动程序会再启动 soffice.bin）。
+    进程须以 new_process_group_kwargs() 启动：POSIX 下整个进程组一起结束；
+    Windows 下使用 taskkill /T 结束整个进程树。
+    """
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    else:
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        process.kill()
+    process.wait()
+
+
+class ConversionTimeout:
+    """
+    按文件大小和已观察到的转换耗时估算超时时间（看门狗）。
+
+    还没有成功转换的记录时，超时为 default_timeout 加上每 MB seconds_per_mb 秒
+    （第一次转换还包括创建配置目录的时间）；之后按最近 history 次转换中最慢的
+    "每 (MB + 1) 耗时" 乘以 safety_factor 估算，限制在 [min_timeout, max_timeout] 内。
+    这样卡住的文档能尽快被结束，大文档也有足够的时间。可在多个线程中共用。
+    """
+
+    def __init__(self, default_timeout=60, seconds_per_mb=10, min_timeout=15, max_timeout=600,
+                 safety_factor=3, history=20):
+        self.default_timeout = default_timeout
+        self.seconds_per_mb = seconds_per_mb
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.safety_factor = safety_factor
+        self._rates = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def estimate(self, size):
+        """大小为 size 字节的文件（或一批文件）的超时秒数"""
+        mb = size / (1024 * 1024)
+        with self._lock:
+            if not self._rates:
+                return min(self.max_timeout, self.default_timeout + self.seconds_per_mb * mb)
+            rate = max(self._rates)
+        return min(self.max_timeout, max(self.min_timeout, self.safety_factor * rate * (mb + 1)))
+
+    def observe(self, size, seconds):
+        """记录一次成功转换的大小和耗时"""
+        with self._lock:
+            self._rates.append(seconds / (size / (1024 * 1024) + 1))
+
+
+# 未指定超时时间时共用的估算器，转换耗时在整个程序内累积
+default_timeouts = ConversionTimeout()
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _run_soffice(cmd, timeout):
+    """
+    运行 LibreOffice 命令，输出保存在内存中。
+    返回 (返回码, 输出文本)；超时时结束整个进程组，返回码为 None。
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        # 在 Windows 上，使用 shell=True 可能更可靠
+        shell=platform.system() == "Windows",
+        **new_process_group_kwargs()
+    )
+    try:
+        output, _ = process.communicate(timeout=timeout)
+        returncode = process.returncode
+    except subprocess.TimeoutExpired:
+        kill_process_tree(process)
+        output, _ = process.communicate()
+        returncode = None
+    return returncode, output.decode("utf-8", errors="replace")
+
+
+def _reset_profile(profile_dir):
+    """删除被结束的 LibreOffice 留下的配置目录（可能残留锁文件或写了一半），下次启动时重新创建"""
+    if profile_dir:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def _soffice_command(libreoffice_path, files, output_dir, profile_dir):
+    cmd = [libreoffice_path, "--headless"]
+    if profile_dir:
+        cmd.append(f"-env:UserInstallation={Path(profile_dir).absolute().as_uri()}")
+    cmd += ["--convert-to", "pdf"]
+    cmd += [os.path.abspath(file_path) for file_path in files]
+    cmd += ["--outdir", os.path.abspath(output_dir)]
+    return cmd
+
+
+def convert_to_pdf(libreoffice_path, file_path, output_dir, timeout=None, profile_dir=None,
+                   retries=2, backoff=1.0, timeouts=None):
+    """
+    调用 LibreOffice 将一个 Word 文件转换为 PDF，返回生成的 PDF 路径，失败时抛出异常。
+    profile_dir 不为 None 时使用该目录作为独立的用户配置目录，
+    多个 LibreOffice 进程同时运行时各自使用不同的配置目录才不会互相冲突。
+
+    timeout 为 None 时由 timeouts（默认 default_timeouts）按文件大小和历史耗时估算。
+    超时的进程连同子进程一起结束并清理配置目录；失败后等待 backoff、2×backoff ... 秒重试
+    retries 次，但超时的文件最多只重试一次（超时时间不变），卡住的文档最多占用两倍超时时间。
+    LibreOffice 的输出只保存在内存中，最终失败时才写入输出目录中的 conversion_log_<文件名>.txt。
+    """
+    timeouts = timeouts or default_timeouts
+    abs_output_dir = os.path.abspath(output_dir)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    expected_pdf = os.path.join(abs_output_dir, f"{base_name}.pdf")
+    size = _file_size(file_path)
+    attempt_timeout = timeout if timeout is not None else timeouts.estimate(size)
+    cmd = _soffice_command(libreoffice_path, [file_path], output_dir, profile_dir)
+
+    logs = []
+    timed_out = False
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        started = time.monotonic()
+        returncode, output = _run_soffice(cmd, attempt_timeout)
+        elapsed = time.monotonic() - started
+
+        if returncode is None:
+            error = f"转换超时（{attempt_timeout:.0f} 秒）: {os.path.basename(file_path)}"
+            _reset_profile(profile_dir)
+        elif returncode != 0:
+            error = f"转换失败，返回码: {returncode}"
+        elif not os.path.exists(expected_pdf):
+            error = f"PDF文件未生成: {expected_pdf}"
+        else:
+            timeouts.observe(size, elapsed)
+            return expected_pdf
+        logs.append(f"第 {attempt + 1} 次尝试: {error}\n{output}")
+        if returncode is None:
+            # 超时的文件最多重试一次
+            if timed_out:
+                break
+            timed_out = True
+
+    log_file = os.path.join(abs_output_dir, f"conversion_log_{base_name}.txt")
+    try:
+        with open(log_file, "w", encoding="utf-8") as log:
+            log.write("\n".join(logs))
+    except OSError:
+        pass
+    raise Exception(f"{error}（已尝试 {len(logs)} 次，日志: {log_file}）\n{output}")
+
+
+def _mtime_ns(path):
+    """文件的修改时间，文件不存在时返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def convert_batch_to_pdf(libreoffice_path, files, output_dir, timeout=None, profile_dir=None, timeouts=None,
+                         poll_interval=0.5):
+    """
+    一次 LibreOffice 调用转换多个文件，只需启动一次 LibreOffice。
+    转换过程中按进度监视：超过一个文件的超时时间（timeout，为 None 时按尚未转换的文件中
+    最大的估算）仍没有新的 PDF 生成时，结束整个进程组并清理配置目录，
+    一个卡住的文档不会让整批等待 N 倍的超时时间。
+    转换后按哪些 PDF 新生成（或被更新）判断每个文件是否成功，
+    未成功的文件（包括整批失败、超时）逐个重新转换（带重试），找出真正出错的文件。
+    返回 [(文件路径, PDF 路径或 None, 异常或 None)]，顺序与 files 相同。
+    """
+    timeouts = timeouts or default_timeouts
+    abs_output_dir = os.path.abspath(output_dir)
+    expected_pdfs = [
+        os.path.join(abs_output_dir, os.path.splitext(os.path.basename(file_path))[0] + ".pdf")
+        for file_path in files
+    ]
+    before = [_mtime_ns(pdf) for pdf in expected_pdfs]
+    sizes = [_file_size(file_path) for file_path in files]
+
+    def converted(i):
+        mtime = _mtime_ns(expected_pdfs[i])
+        return mtime is not None and mtime != before[i]
+
+    def file_timeout(pending):
+        if timeout is not None:
+            return timeout
+        return max(timeouts.estimate(sizes[i]) for i in pending)
+
+    started = time.monotonic()
+    process = subprocess.Popen(
+        _soffice_command(libreoffice_path, files, output_dir, profile_dir),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        shell=platform.system() == "Windows",
+        **new_process_group_kwargs()
+    )
+    pending = list(range(len(files)))
+    deadline = time.monotonic() + file_timeout(pending)
+    while True:
+        try:
+            process.wait(timeout=poll_interval)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        remaining = [i for i in pending if not converted(i)]
+        if len(remaining) < len(pending):
+            # 有新的 PDF 生成，重新计时
+            pending = remaining
+            if pending:
+                deadline = time.monotonic() + file_timeout(pending)
+        if time.monotonic() > deadline:
+            # 已经生成的 PDF 仍然有效，其余文件下面逐个重试
+            kill_process_tree(process)
+            _reset_profile(profile_dir)
+            break
+    elapsed = time.monotonic() - started
+
+    results = []
+    for i, file_path in enumerate(files):
+        if converted(i):
+            results.append((file_path, expected_pdfs[i], None))
+            continue
+        try:
+            results.append((file_path, convert_to_pdf(libreoffice_path, file_path, output_dir, timeout=timeout,
+                                                      profile_dir=profile_dir, timeouts=timeouts), None))
+        except Exception as e:
+            results.append((file_path, None, e))
+    if process.returncode == 0 and all(error is None for _, _, error in results):
+        # 整批一次成功时按总大小记录耗时（整批只包含一次启动时间）
+        timeouts.observe(sum(sizes), elapsed)
+    return results
+
+
+def _make_batches(files, batch_size):
+    """按 batch_size 分批；同一批中的文件不能重名（否则生成的 PDF 会互相覆盖），重名时另起一批"""
+    batches = []
+    batch = []
+    names = set()
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if len(batch) >= batch_size or name in names:
+            batches.append(batch)
+            batch = []
+            names = set()
+        batch.append(file_path)
+        names.add(name)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def convert_files_to_pdf(libreoffice_path, files, output_dir, workers=1, timeout=None, batch_size=1):
+    """
+    同时运行最多 workers 个 LibreOffice 进程转换 files，每个进程使用独立的配置目录。
+    batch_size 大于 1 时每个 LibreOffice 进程一次转换一批文件（见 convert_batch_to_pdf），
+    减少启动 LibreOffice 的次数。
+    按完成的先后逐个产生 (文件路径, PDF 路径或 None, 异常或 None)。
+    """
+    profile_root = tempfile.mkdtemp(prefix="office-tools-lo-")
+    # 配置目录不能被两个进程同时使用：每个转换任务取用一个空闲的目录，结束后归还
+    profiles = queue.Queue()
+    for i in range(max(1, workers)):
+        profiles.put(os.path.join(profile_root, str(i)))
+
+    def convert(batch):
+        profile_dir = profiles.get()
+        try:
+            if len(batch) > 1:
+                return convert_batch_to_pdf(libreoffice_path, batch, output_dir,
+                                            timeout=timeout, profile_dir=profile_dir)
+            try:
+                return [(batch[0], convert_to_pdf(libreoffice_path, batch[0], output_dir,
+                                                  timeout=timeout, profile_dir=profile_dir), None)]
+            except Exception as e:
+                return [(batch[0], None, e)]
+        finally:
+            profiles.put(profile_dir)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(convert, batch) for batch in _make_batches(files, max(1, batch_size))]
+            for future in as_completed(futures):
+                yield from future.result()
+    finally:
+        shutil.rmtree(profile_root, ignore_errors=True)
+
+
+class PdfConversionQueue:
+    """
+    后台 PDF 转换队列：submit() 放入待转换的文件后立即返回，
+    由 workers 个线程各自调用 LibreOffice（使用独立的配置目录）依次转换。
+
+    转换结果不通过回调通知，而是由调用方在自己的线程中通过 poll() / drain() 取回，
+    这样界面更新始终在调用方线程中进行。
+    """
+
+    def __init__(self, libreoffice_path, output_dir, workers=1, timeout=None):
+        self.libreoffice_path = libreoffice_path
+        self.output_dir = output_dir
+        self.timeout = timeout
+        self.submitted = 0
+        self.finished = 0
+
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._profile_root = tempfile.mkdtemp(prefix="office-tools-lo-")
+        self._threads = [
+            threading.Thread(target=self._work, args=(os.path.join(self._profile_root, str(i)),), daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self, profile_dir):
+        while True:
+            file_path = self._tasks.get()
+            if file_path is None:
+                return
+            try:
+                pdf_path = convert_to_pdf(self.libreoffice_path, file_path, self.output_dir,
+                                          timeout=self.timeout, profile_dir=profile_dir)
+                self._results.put((file_path, pdf_path, None))
+            except Exception as e:
+                self._results.put((file_path, None, e))
+
+    def submit(self, file_path):
+        """加入一个待转换的文件"""
+        self._tasks.put(file_path)
+        self.submitted += 1
+
+    def poll(self):
+        """取回已完成的转换结果 [(文件路径, PDF 路径或 None, 异常或 None)]，不等待"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self.finished += len(results)
+        return results
+
+    def drain(self):
+        """不再接受新文件，逐个产生剩余的转换结果，全部完成后返回"""
+        for _ in self._threads:
+            self._tasks.put(None)
+        while self.finished < self.submitted:
+            result = self._results.get()
+            self.finished += 1
+            yield result
+
+    def close(self):
+        """停止后台线程（丢弃尚未开始的转换）并删除临时配置目录"""
+        while True:
+            try:
+                self._tasks.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        shutil.rmtree(self._profile_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,241 @@
+import io
+import os
+from collections import OrderedDict, namedtuple
+
+from docx.opc.constants import CONTENT_TYPE
+from docx.shared import Mm
+from docxtpl import DocxTemplate, InlineImage
+from jinja2 import Environment, meta
+
+from compiled_template import CORE_PROPERTIES, CompiledTemplate
+
+# 可选的渲染引擎：docxtpl 为原始实现，compiled 为预编译模板（见 compiled_template.py）
+ENGINES = {
+    "docxtpl": DocxTemplate,
+    "compiled": CompiledTemplate,
+}
+
+# 数据行中用于指定模板的列，值为相对于模板目录的文件名
+TEMPLATE_COLUMN = "模板"
+
+# 以此后缀结尾的列为图片列，值为图片路径（相对路径相对于 image_dir）
+IMAGE_COLUMN_SUFFIX = "_图片"
+
+# 渲染设置
+# engine / compresslevel: 见 load_template
+# template_dir / cache_size: 按行选择模板时的模板目录与模板缓存大小
+# image_dir / image_width_mm: 图片列相对路径的基准目录与插入宽度（毫米，None 为原始大小）
+RenderOptions = namedtuple(
+    "RenderOptions",
+    ["engine", "compresslevel", "template_dir", "cache_size", "image_dir", "image_width_mm"]
+)
+
+# 当前工作进程的渲染状态（由 init_worker 在进程启动时创建）
+_worker_template_path = None
+_worker_options = None
+_worker_cache = None
+_worker_images = None
+
+
+def load_template(template_path, engine="docxtpl", compresslevel=None):
+    """
+    按引擎名称加载模板，返回的对象均提供 render(context) 和 save(filename)。
+    compresslevel 仅对 compiled 引擎有效，不为 None 时启用直通写出。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"未知的渲染引擎：{engine}")
+    if engine == "compiled":
+        return CompiledTemplate(template_path, compresslevel=compresslevel)
+    return ENGINES[engine](template_path)
+
+
+class TemplateCache:
+    """
+    已加载模板的 LRU 缓存，以 (路径, 修改时间) 为键，
+    无论数据行中的模板如何交替出现，每个模板在一次运行中只解析一次；模板文件被修改后自动重新加载。
+    """
+
+    def __init__(self, engine="docxtpl", compresslevel=None, maxsize=8):
+        self.engine = engine
+        self.compresslevel = compresslevel
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+
+    def get(self, template_path):
+        """返回加载好的模板，缓存已满时淘汰最久未使用的模板"""
+        if not os.path.isfile(template_path):
+            raise FileNotFoundError(f"模板文件不存在：{template_path}")
+        key = (os.path.abspath(template_path), os.path.getmtime(template_path))
+        if key in self._templates:
+            self.hits += 1
+            self._templates.move_to_end(key)
+            return self._templates[key]
+
+        self.misses += 1
+        doc = load_template(template_path, self.engine, self.compresslevel)
+        self._templates[key] = doc
+        if len(self._templates) > self.maxsize:
+            self._templates.popitem(last=False)
+        return doc
+
+
+class ImageCache:
+    """
+    图片列的图片缓存（LRU），以 (路径, 修改时间) 为键。
+    同一张印章 / 签名即使用在上万份文档中也只读取一次，缓存数量有上限，内存不随行数增长。
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = max(1, maxsize)
+        self._images = OrderedDict()
+
+    def get(self, image_path):
+        """返回图片文件的内容"""
+        if not os.path.isfile(image_path):
+            raise FileNotFoundError(f"图片文件不存在：{image_path}")
+        key = (os.path.abspath(image_path), os.path.getmtime(image_path))
+        if key in self._images:
+            self._images.move_to_end(key)
+            return self._images[key]
+
+        with open(image_path, "rb") as f:
+            data = f.read()
+        self._images[key] = data
+        if len(self._images) > self.maxsize:
+            self._images.popitem(last=False)
+        return data
+
+
+def attach_images(doc, context, image_cache, image_dir=None, image_width_mm=None):
+    """
+    将图片列（列名以 "_图片" 结尾）的路径替换为 docxtpl 的 InlineImage，返回新的 context。
+    值为空的图片列渲染为空。InlineImage 需要 docxtpl 引擎。
+    """
+    images = {}
+    for key, value in context.items():
+        if not (isinstance(key, str) and key.endswith(IMAGE_COLUMN_SUFFIX)):
+            continue
+        path = str(value).strip()
+        if not path:
+            continue
+        if image_dir and not os.path.isabs(path):
+            path = os.path.join(image_dir, path)
+        width = Mm(image_width_mm) if image_width_mm else None
+        images[key] = InlineImage(doc, io.BytesIO(image_cache.get(path)), width=width)
+    if not images:
+        return context
+    return {**context, **images}
+
+
+def has_image_columns(columns):
+    """判断数据列中是否有图片列"""
+    return any(isinstance(col, str) and col.endswith(IMAGE_COLUMN_SUFFIX) for col in columns)
+
+
+def select_template(context, template_path, template_dir=None):
+    """
+    确定数据行使用的模板：指定了模板目录且该行 "模板" 列不为空时使用该列指定的模板
+    （省略扩展名时默认为 .docx），否则使用默认模板。
+    """
+    name = str(context.get(TEMPLATE_COLUMN, "")).strip() if template_dir else ""
+    if not name:
+        return template_path
+    path = os.path.join(template_dir, name)
+    if not os.path.splitext(path)[1]:
+        path += ".docx"
+    return path
+
+
+def list_templates(template_dir):
+    """列出模板目录（含子目录）中的所有 docx 模板"""
+    paths = []
+    for root, _, files in os.walk(template_dir):
+        for name in files:
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def template_variables(template_path):
+    """
+    分析模板中用到的变量（未在模板内定义的 Jinja 变量），
+    覆盖正文、页眉、页脚，以及同样会被渲染的核心属性和脚注。
+    """
+    env = Environment()
+    doc = DocxTemplate(template_path)
+    variables = set(doc.get_undeclared_template_variables(env))
+
+    docx = doc.get_docx()
+    sources = [getattr(docx.core_properties, prop) for prop in CORE_PROPERTIES]
+    for part in docx.part.package.parts:
+        if part.content_type == CONTENT_TYPE.WML_FOOTNOTES:
+            sources.append(doc.patch_xml(part.blob.decode("utf-8")))
+    for source in sources:
+        variables |= meta.find_undeclared_variables(env.parse(source))
+
+    # range 等 Jinja 内置全局变量不对应数据列
+    return variables - set(env.globals)
+
+
+def resolve_doc_name(context, row_index):
+    """
+    根据数据行确定输出文件名。
+    Excel 中有 "文件名" 列时使用该列内容，否则用 output_序号 命名。
+    """
+    if "文件名" in context:
+        return str(context["文件名"])
+    return f"output_{row_index}"
+
+
+def render_row(doc, context, row_index, output_dir=None):
+    """
+    渲染单行数据，返回 (文件名, 内容)。
+    指定 output_dir 时直接保存到该目录，内容返回 None；否则不写文件，返回生成的 docx 字节。
+    """
+    doc.render(context)
+    file_name = f"{resolve_doc_name(context, row_index)}.docx"
+    if output_dir is not None:
+        doc.save(os.path.join(output_dir, file_name))
+        return file_name, None
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return file_name, buffer.getvalue()
+
+
+def iter_chunks(rows, chunk_size):
+    """将 (行号, context) 序列按 chunk_size 切分成若干列表"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def init_worker(template_path, options):
+    """进程池初始化函数：每个工作进程持有自己的模板缓存和图片缓存，每个模板只加载一次"""
+    global _worker_template_path, _worker_options, _worker_cache, _worker_images
+    _worker_template_path = template_path
+    _worker_options = options
+    _worker_cache = TemplateCache(options.engine, options.compresslevel, options.cache_size)
+    _worker_images = ImageCache()
+
+
+def render_chunk(rows, output_dir=None):
+    """
+    在工作进程中渲染一批数据行。
+    rows: [(行号, context), ...]
+    返回 (每行的 (文件名, 内容) 列表, (本批模板缓存命中次数, 未命中次数))，前者含义同 render_row。
+    """
+    options = _worker_options
+    hits, misses = _worker_cache.hits, _worker_cache.misses
+    results = []
+    for row_index, context in rows:
+        doc = _worker_cache.get(select_template(context, _worker_template_path, options.template_dir))
+        context = attach_images(doc, context, _worker_images, options.image_dir, options.image_width_mm)
+        results.append(render_row(doc, context, row_index, output_dir))
+    return results, (_worker_cache.hits - hits, _worker_cache.misses - misses)
@@ -0,0 +1,291 @@
+import codecs
+import csv
+import os
+
+import openpyxl
+import pandas as pd
+
+# pandas 默认识别为缺失值的字符串，读入后与 NaN 一样变成空字符串
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+# Excel 错误值（pandas 同样按缺失值处理）
+EXCEL_ERRORS = {"#DIV/0!", "#NAME?", "#NULL!", "#NUM!", "#REF!", "#VALUE!"}
+
+# 支持流式读取的文件类型（openpyxl 只读模式）
+STREAMING_EXTENSIONS = {".xlsx", ".xlsm"}
+
+# 文本表格文件及其分隔符
+DELIMITED_EXTENSIONS = {".csv": ",", ".tsv": "\t"}
+
+PARQUET_EXTENSIONS = {".parquet"}
+
+# 检测文本编码时读取的字节数
+ENCODING_SAMPLE_SIZE = 1024 * 1024
+
+
+def cell_to_str(value):
+    """
+    将 openpyxl 读出的单元格值转换为字符串，
+    结果与 pd.read_excel(dtype=str) + fillna("") 一致。
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return "" if value in NA_VALUES or value in EXCEL_ERRORS else value
+    if isinstance(value, float) and value.is_integer():
+        # 整数值的浮点数按整数输出，避免手机号等出现 ".0"
+        return str(int(value))
+    return str(value)
+
+
+def _make_columns(header):
+    """按 pandas 的规则生成列名：空标题为 "Unnamed: 序号"，重复列名追加 ".1"、".2" 等后缀"""
+    columns = []
+    seen = {}
+    for i, value in enumerate(header):
+        if value is None or value == "":
+            name = f"Unnamed: {i}"
+        elif isinstance(value, float) and value.is_integer():
+            name = int(value)
+        else:
+            name = value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def detect_encoding(path):
+    """
+    检测 CSV / TSV 文件的编码：能按 UTF-8 解码时使用 utf-8-sig（兼容带 BOM 的文件），
+    否则按 gb18030 读取（兼容 Excel 在中文 Windows 下另存的 GBK 文件）。
+    只检查文件开头的一部分。
+    """
+    with open(path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    try:
+        # 样本末尾可能截断了一个多字节字符，文件未读完时不要求样本完整
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(sample) < ENCODING_SAMPLE_SIZE)
+    except UnicodeDecodeError:
+        return "gb18030"
+    return "utf-8-sig"
+
+
+def _import_parquet():
+    """导入 pyarrow.parquet，未安装时给出明确的提示"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("读取 Parquet 文件需要安装 pyarrow：pip install pyarrow") from None
+    return pq
+
+
+def _parquet_columns(pq, path):
+    """Parquet 文件中的数据列（不含 pandas 写入的索引列）"""
+    return [name for name in pq.read_schema(path).names if not name.startswith("__index_level_")]
+
+
+def parquet_value_to_str(value):
+    """将 Parquet 中的值转换为字符串，缺失值为空字符串，整数值的浮点数按整数输出"""
+    if value is None or value != value:  # None / NaN
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_header(excel_path):
+    """只读取标题行，返回列名列表"""
+    ext = os.path.splitext(excel_path)[1].lower()
+    if ext in DELIMITED_EXTENSIONS:
+        with open(excel_path, "r", encoding=detect_encoding(excel_path), newline="") as f:
+            return _make_columns(next(csv.reader(f, delimiter=DELIMITED_EXTENSIONS[ext]), ()))
+    if ext in PARQUET_EXTENSIONS:
+        return _parquet_columns(_import_parquet(), excel_path)
+    if ext in STREAMING_EXTENSIONS:
+        wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            header = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        return _make_columns(header)
+    return list(pd.read_excel(excel_path, dtype=str, nrows=0).columns)
+
+
+def _iter_sheet_rows(wb, ws, usecols=None):
+    """逐行产生 (行号, context)，读取结束后关闭工作簿"""
+    try:
+        values = ws.iter_rows(values_only=True)
+        header = next(values, None)
+        if header is None:
+            return
+        columns = _make_columns(header)
+        # 只保留需要的列：记录其位置，逐行只转换这些单元格
+        positions = [i for i, col in enumerate(columns) if usecols is None or col in usecols]
+        columns = [columns[i] for i in positions]
+        empty_context = {col: "" for col in columns}
+
+        row_index = 0
+        # 连续空行先只计数：后面还有数据时照常输出，位于表格末尾时丢弃（与 pandas 一致）
+        pending_empty = 0
+        for row in values:
+            cells = [cell_to_str(row[i]) if i < len(row) else "" for i in positions]
+            # 整行（包括未读取的列）都为空才算空行
+            if not any(cells) and not any(cell_to_str(value) for value in row):
+                pending_empty += 1
+                continue
+            for _ in range(pending_empty):
+                yield row_index, dict(empty_context)
+                row_index += 1
+            pending_empty = 0
+
+            yield row_index, dict(zip(columns, cells))
+            row_index += 1
+    finally:
+        wb.close()
+
+
+def _open_streaming_rows(excel_path, usecols=None):
+    """使用 openpyxl 只读模式流式读取 Excel，不把整张表读入内存"""
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    ws = wb.active
+    if ws.max_row is None:
+        # 文件中没有记录表格尺寸时，先快速数一遍行数，用于显示进度
+        total = sum(1 for _ in ws.iter_rows(values_only=True)) - 1
+    else:
+        # 表格尺寸可能包含末尾空行，仅作为进度估计
+        total = ws.max_row - 1
+    return max(total, 0), _iter_sheet_rows(wb, ws, usecols)
+
+
+def _iter_delimited_rows(f, delimiter, usecols=None):
+    """使用 csv 模块逐行产生 (行号, context)，读取结束后关闭文件"""
+    try:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _make_columns(header)
+        positions = [i for i, col in enumerate(columns) if usecols is None or col in usecols]
+        columns = [columns[i] for i in positions]
+
+        row_index = 0
+        for row in reader:
+            if not row:
+                # 与 pandas 一致，跳过空行
+                continue
+            cells = [row[i] if i < len(row) else "" for i in positions]
+            yield row_index, {col: "" if cell in NA_VALUES else cell for col, cell in zip(columns, cells)}
+            row_index += 1
+    finally:
+        f.close()
+
+
+def _open_delimited_rows(path, delimiter, usecols=None):
+    """使用 csv 模块流式读取 CSV / TSV 文件"""
+    # 按换行符数量估计行数（仅用于显示进度），数换行比解析快得多
+    with open(path, "rb") as f:
+        total = sum(block.count(b"\n") for block in iter(lambda: f.read(1024 * 1024), b"")) - 1
+    f = open(path, "r", encoding=detect_encoding(path), newline="")
+    return max(total, 0), _iter_delimited_rows(f, delimiter, usecols)
+
+
+def _iter_parquet_batches(parquet_file, columns):
+    """按批读取 Parquet 文件，逐行产生 (行号, context)"""
+    row_index = 0
+    for batch in parquet_file.iter_batches(columns=columns):
+        for record in batch.to_pylist():
+            yield row_index, {col: parquet_value_to_str(record[col]) for col in columns}
+            row_index += 1
+
+
+def _open_parquet_rows(path, usecols=None):
+    """按批流式读取 Parquet 文件"""
+    pq = _import_parquet()
+    columns = [col for col in _parquet_columns(pq, path) if usecols is None or col in usecols]
+    parquet_file = pq.ParquetFile(path)
+    return parquet_file.metadata.num_rows, _iter_parquet_batches(parquet_file, columns)
+
+
+def read_table(path, usecols=None):
+    """
+    将整个数据文件读入 DataFrame，所有值均为字符串（缺失值为空字符串）。
+    usecols 为列名集合时只读取这些列。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    column_filter = None if usecols is None else (lambda col: col in usecols)
+
+    if ext in PARQUET_EXTENSIONS:
+        pq = _import_parquet()
+        columns = [col for col in _parquet_columns(pq, path) if usecols is None or col in usecols]
+        df = pd.read_parquet(path, columns=columns, engine="pyarrow")
+        # 值按原类型读取，逐个转换为字符串
+        return df.astype(object).map(parquet_value_to_str)
+
+    def read(columns):
+        if ext in DELIMITED_EXTENSIONS:
+            return pd.read_csv(
+                path,
+                sep=DELIMITED_EXTENSIONS[ext],
+                encoding=detect_encoding(path),
+                dtype=str,
+                usecols=columns
+            )
+        # 读取 Excel（假设第一行是标题行，列名对应模板中的变量）
+        return pd.read_excel(
+            path,
+            dtype=str,  # 将所有列都以字符串方式读入
+            usecols=columns
+        )
+
+    df = read(column_filter)
+    if usecols is not None and len(df.columns) == 0:
+        # 一列都不需要时 pandas 返回 0 行的表格：只读第一列来保留行数，每行渲染为空的 context
+        df = read([0]).iloc[:, :0]
+    df.fillna("", inplace=True)  # 将所有的 NaN 变成空字符串
+    return df
+
+
+def _iter_dataframe_rows(df):
+    """逐行产生 (行号, context)，直接使用元组而不为每行构造 Series"""
+    columns = list(df.columns)
+    if not columns:
+        # 没有列时 itertuples 不产生任何行，仍按行数产生空的 context
+        for row_index in range(len(df)):
+            yield row_index, {}
+        return
+    for row_index, values in enumerate(df.itertuples(index=False, name=None)):
+        yield row_index, dict(zip(columns, values))
+
+
+def open_rows(excel_path, streaming=False, usecols=None, cache=None):
+    """
+    打开数据源（Excel、CSV、TSV 或 Parquet），返回 (总行数, 行迭代器)。
+    行迭代器产生 (行号, context)，context 的 key=列名, value=单元格内容（字符串）。
+    streaming 为 True 时流式读取（xls 除外），此时总行数可能为估计值。
+    usecols 为列名集合时只读取这些列。
+    cache 为 TableCache 时（非流式读取）优先使用缓存的解析结果。
+    """
+    ext = os.path.splitext(excel_path)[1].lower()
+    if streaming:
+        if ext in DELIMITED_EXTENSIONS:
+            return _open_delimited_rows(excel_path, DELIMITED_EXTENSIONS[ext], usecols)
+        if ext in PARQUET_EXTENSIONS:
+            return _open_parquet_rows(excel_path, usecols)
+        if ext in STREAMING_EXTENSIONS:
+            return _open_streaming_rows(excel_path, usecols)
+
+    if cache is not None:
+        # 缓存中保存的是全部列，读取后再选出需要的列
+        df = cache.load(excel_path, read_table)
+        if usecols is not None:
+            df = df[[col for col in df.columns if col in usecols]]
+    else:
+        df = read_table(excel_path, usecols)
+    return len(df), _iter_dataframe_rows(df)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+# 清单文件保存在输出目录中
+MANIFEST_NAME = ".office-tools-manifest.jsonl"
+
+
+def file_hash(path):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def context_hash(context):
+    """计算一行数据（context 字典）的哈希，与列的顺序无关"""
+    data = json.dumps(
+        sorted((str(key), str(value)) for key, value in context.items()),
+        ensure_ascii=False
+    )
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """
+    生成记录清单，用于增量生成和中断后续跑。
+
+    清单为 JSON Lines 文件：第一行记录模板的哈希，之后每生成一个文件追加一行
+    {"file": 文件名, "hash": 数据行哈希}。每条记录写入后立即 flush，
+    程序中途退出时已完成的记录不会丢失。模板发生变化时清单作废，所有行重新生成。
+    """
+
+    def __init__(self, output_dir, template_hash):
+        self.output_dir = output_dir
+        self.template_hash = template_hash
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = self._load()
+
+        # 重写一遍清单：去掉重复记录和写了一半的行
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"template": template_hash}) + "\n")
+            for file_name, row_hash in self.entries.items():
+                f.write(json.dumps({"file": file_name, "hash": row_hash}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        """读取已有清单，模板不一致或清单不存在时返回空记录"""
+        if not os.path.isfile(self.path):
+            return {}
+
+        entries = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 程序中途退出时最后一行可能不完整
+                    continue
+                if line_no == 0:
+                    if record.get("template") != self.template_hash:
+                        return {}
+                elif "file" in record:
+                    entries[record["file"]] = record["hash"]
+        return entries
+
+    def is_up_to_date(self, file_name, row_hash):
+        """输出文件已存在且数据行未变化时返回 True"""
+        return (
+            self.entries.get(file_name) == row_hash
+            and os.path.isfile(os.path.join(self.output_dir, file_name))
+        )
+
+    def record(self, file_name, row_hash):
+        """记录一个已生成的文件"""
+        self.entries[file_name] = row_hash
+        self._file.write(json.dumps({"file": file_name, "hash": row_hash}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import pickle
+
+from cache_utils import evict_lru, get_cache_dir
+from run_manifest import file_hash
+
+# 快照格式变化时修改版本号，旧快照自动失效
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_SUFFIX = ".pkl"
+
+
+class TableCache:
+    """
+    数据文件解析结果的本地缓存。
+
+    解析后的完整表格（全部列，均为字符串）以 pickle 快照保存在缓存目录中，
+    键由文件路径、大小、修改时间和内容哈希共同决定，文件有任何变化都会重新解析。
+    缓存的是全部列，修改模板后用到的列不同也能命中。
+    缓存总大小超过 max_bytes 时按最近使用时间淘汰旧快照。
+    缓存目录无法创建时不使用缓存，每次都直接解析。
+    """
+
+    def __init__(self, max_bytes, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir or get_cache_dir("tables")
+        self.hits = 0
+        self.misses = 0
+
+    def _snapshot_path(self, path):
+        stat = os.stat(path)
+        key = "|".join([
+            str(SNAPSHOT_VERSION),
+            os.path.abspath(path),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            file_hash(path),
+        ])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + SNAPSHOT_SUFFIX)
+
+    def load(self, path, read_table):
+        """
+        返回数据文件解析后的 DataFrame：快照存在时直接读取，
+        否则调用 read_table(path) 解析并保存快照。
+        """
+        if self.cache_dir is None:
+            self.misses += 1
+            return read_table(path)
+
+        snapshot_path = self._snapshot_path(path)
+        if os.path.isfile(snapshot_path):
+            try:
+                with open(snapshot_path, "rb") as f:
+                    df = pickle.load(f)
+            except Exception:
+                # 快照损坏或由不兼容的 pandas 版本写入，重新解析
+                os.remove(snapshot_path)
+            else:
+                os.utime(snapshot_path)  # 记录最近使用时间
+                self.hits += 1
+                return df
+
+        self.misses += 1
+        df = read_table(path)
+        self._store(snapshot_path, df)
+        return df
+
+    def _store(self, snapshot_path, df):
+        tmp_path = snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+        except OSError:
+            # 写缓存失败（如磁盘空间不足）不影响本次生成
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        evict_lru(self.cache_dir, self.max_bytes, SNAPSHOT_SUFFIX)